@@ -0,0 +1,645 @@
+__author__ = "Altertech Group, https://www.altertech.com/"
+__copyright__ = "Copyright (C) 2012-2021 Altertech Group"
+__license__ = "Apache License 2.0"
+__version__ = "3.4.2"
+
+import argparse
+import sys
+import os
+import time
+import json
+import socket
+import platform
+import threading
+import subprocess
+import neotermcolor
+
+neotermcolor.set_style('debug', color='grey', attrs='bold')
+neotermcolor.set_style('error', color='red', attrs='bold')
+neotermcolor.set_style('warning', color='yellow')
+neotermcolor.set_style('counter', color='yellow', attrs='bold')
+
+cprint = neotermcolor.cprint
+
+from pathlib import Path
+dir_eva = Path(__file__).absolute().parents[1]
+sys.path.insert(0, (dir_eva / 'lib').as_posix())
+
+from eva.client.apiclient import APIClientLocal
+from eva.client.apiclient import result_ok
+
+BENCHMARKS = [
+    'ingest', 'fanout', 'dm', 'macro', 'history', 'startup', 'lanes'
+]
+
+# benchmarks, which restart controllers, are not run by default
+RESTART_BENCHMARKS = ['startup', 'lanes']
+
+BENCHMARK_GROUP = 'eva_benchmarks'
+
+_me = 'EVA ICS core benchmark suite version %s' % __version__
+
+ap = argparse.ArgumentParser(description=_me)
+
+ap.add_argument('benchmarks',
+                metavar='BENCHMARK',
+                nargs='*',
+                help='Benchmarks to run: {} (default: all, except {})'.format(
+                    ', '.join(BENCHMARKS), ', '.join(RESTART_BENCHMARKS)))
+ap.add_argument('-n',
+                '--items',
+                help='Number of items for ingest benchmark (default: 100)',
+                type=int,
+                default=100)
+ap.add_argument('-N',
+                '--lane-items',
+                help='Comma separated item counts for lanes benchmark '
+                '(default: 100,1000,5000)',
+                default='100,1000,5000')
+ap.add_argument('-i',
+                '--iterations',
+                help='Iterations per benchmark (default: 1000)',
+                type=int,
+                default=1000)
+ap.add_argument('-K',
+                '--ws-clients',
+                help='WebSocket clients for fan-out benchmark (default: 10)',
+                type=int,
+                default=10)
+ap.add_argument('-a',
+                '--history-notifier',
+                help='DB notifier to query history from (default: db_1)',
+                default='db_1')
+ap.add_argument('-o',
+                '--output',
+                help='Write JSON report to the file',
+                metavar='FILE')
+ap.add_argument('-c',
+                '--compare',
+                help='Compare results with the previous JSON report',
+                metavar='FILE')
+ap.add_argument('-T',
+                '--timeout',
+                help='Max time to wait for a benchmark completion '
+                '(default: 60)',
+                type=float,
+                default=60)
+
+try:
+    import argcomplete
+    argcomplete.autocomplete(ap)
+except:
+    pass
+
+a = ap.parse_args()
+
+if a.benchmarks:
+    for b in a.benchmarks:
+        if b not in BENCHMARKS:
+            cprint(f'Unknown benchmark: {b}', '@error')
+            sys.exit(1)
+    benchmarks = a.benchmarks
+else:
+    benchmarks = [b for b in BENCHMARKS if b not in RESTART_BENCHMARKS]
+
+try:
+    lane_items = sorted({int(x) for x in a.lane_items.split(',')})
+    if not lane_items or lane_items[0] < 1:
+        raise ValueError
+except ValueError:
+    cprint(f'Invalid item counts: {a.lane_items}', '@error')
+    sys.exit(1)
+
+clients = {}
+
+
+class BenchmarkFailed(Exception):
+    pass
+
+
+def get_client(product):
+    try:
+        return clients[product]
+    except KeyError:
+        c = APIClientLocal(product)
+        clients[product] = c
+        return c
+
+
+def api_call(product, func, params=None, eoe=True):
+    code, result = get_client(product).call(func, params)
+    if eoe and code != result_ok:
+        raise BenchmarkFailed('{}: function {}({}) failed, API code: {}'.format(
+            product, func, params, code))
+    return code, result
+
+
+def wait_for(func, timeout=None):
+    if timeout is None:
+        timeout = a.timeout
+    t_end = time.perf_counter() + timeout
+    while time.perf_counter() < t_end:
+        if func():
+            return time.perf_counter()
+        time.sleep(0.001)
+    raise BenchmarkFailed('timeout')
+
+
+def progress(i, total):
+    p = i / total * 100
+    if p and p == int(p) and not p % 10:
+        cprint(f'\r{p:.0f}%', '@counter', end=' ' * 2, flush=True)
+
+
+def percentile(data, p):
+    if not data:
+        return None
+    data = sorted(data)
+    k = (len(data) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(data) - 1)
+    return data[f] + (data[c] - data[f]) * (k - f)
+
+
+def latency_stats(data):
+    return {
+        'count': len(data),
+        'min': min(data) if data else None,
+        'avg': sum(data) / len(data) if data else None,
+        'p50': percentile(data, 50),
+        'p90': percentile(data, 90),
+        'p99': percentile(data, 99),
+        'max': max(data) if data else None
+    }
+
+
+def proc_stats(product):
+    """
+    get controller process thread count and RSS (bytes)
+    """
+    code, data = api_call(product, 'test')
+    result = {'threads': data.get('threads'), 'rss': None}
+    try:
+        with open(f'/proc/{data["pid"]}/status') as fh:
+            for line in fh:
+                k, v = line.split(':', 1)
+                if k == 'Threads':
+                    result['threads'] = int(v)
+                elif k == 'VmRSS':
+                    result['rss'] = int(v.split()[0]) * 1024
+    except (KeyError, OSError, ValueError):
+        pass
+    return result
+
+
+def restart_controller(product, boot_id):
+    """
+    restart the controller
+
+    Returns:
+        tuple (stop time, time from the start command to the first successful
+        API call)
+    """
+    eva_control = (dir_eva / 'sbin' / 'eva-control').as_posix()
+    t_start = time.perf_counter()
+    subprocess.run([eva_control, 'stop', product],
+                   stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL)
+    t_stopped = time.perf_counter()
+    subprocess.Popen([eva_control, 'start', product],
+                     stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL)
+
+    def started():
+        try:
+            code, data = api_call(product, 'test', eoe=False)
+            return code == result_ok and data.get('boot_id') != boot_id
+        except:
+            return False
+
+    return t_stopped - t_start, wait_for(started) - t_stopped
+
+
+def item_value(product, oid):
+    code, result = api_call(product, 'state', {'i': oid})
+    return result.get('value')
+
+
+def bench_ingest():
+    """
+    state ingest throughput: N sensors assigned to vrtsensors PHI ports, PHI
+    events are pushed with "test_phi" and processed by the core
+    """
+    n = a.items
+    iterations = a.iterations
+    phi_id = 'eva_benchmark_vs'
+    oids = [
+        f'sensor:{BENCHMARK_GROUP}/eva_benchmark_sensor_{x}'
+        for x in range(n)
+    ]
+    api_call('uc', 'unload_phi', {'i': phi_id}, eoe=False)
+    api_call('uc', 'load_phi', {
+        'i': phi_id,
+        'm': 'vrtsensors',
+        'c': 'event_on_test_set=1'
+    })
+    try:
+        t_start = time.perf_counter()
+        for x, oid in enumerate(oids):
+            api_call('uc', 'destroy', {'i': oid}, eoe=False)
+            api_call('uc', 'create', {'i': oid})
+            api_call('uc', 'assign_driver', {
+                'i': oid,
+                'd': f'{phi_id}.default',
+                'c': f'port={1000 + x}'
+            })
+            api_call('uc', 'update', {'i': oid, 's': 1})
+        t_create = time.perf_counter() - t_start
+        params = {'i': phi_id}
+        t_start = time.perf_counter()
+        for i in range(iterations):
+            params['c'] = '{}={}'.format(1000 + i % n, i + 1)
+            api_call('uc', 'test_phi', params)
+            progress(i + 1, iterations)
+        last = iterations - 1
+        last_oid = oids[last % n]
+        t_end = wait_for(
+            lambda: str(item_value('uc', last_oid)) in [
+                str(last + 1), str(float(last + 1))
+            ])
+        elapsed = t_end - t_start
+        return {
+            'items': n,
+            'iterations': iterations,
+            'create_time': t_create,
+            'elapsed': elapsed,
+            'events_per_sec': iterations / elapsed,
+            'item_updates_per_sec': iterations * n / elapsed
+        }
+    finally:
+        for oid in oids:
+            api_call('uc', 'destroy', {'i': oid}, eoe=False)
+        api_call('uc', 'unload_phi', {'i': phi_id}, eoe=False)
+
+
+def bench_fanout():
+    """
+    notifier fan-out latency: K WebSocket clients subscribed to the sensor
+    state, latency is measured from the API call to the frame receival
+    """
+    import websocket
+    k = a.ws_clients
+    iterations = a.iterations
+    oid = f'sensor:{BENCHMARK_GROUP}/eva_benchmark_fanout'
+    c = get_client('uc')
+    uri = c._uri.replace('http://', 'ws://').replace('https://', 'wss://')
+    api_call('uc', 'destroy', {'i': oid}, eoe=False)
+    api_call('uc', 'create', {'i': oid})
+    api_call('uc', 'update', {'i': oid, 's': 1, 'v': 0})
+    received = {}
+    latencies = []
+    lock = threading.Lock()
+    cond = threading.Condition(lock)
+    sockets = []
+    sent = {}
+
+    def listener(ws):
+        while True:
+            try:
+                frame = ws.recv()
+            except:
+                return
+            t = time.perf_counter()
+            try:
+                data = json.loads(frame)
+            except:
+                continue
+            if data.get('s') != 'state':
+                continue
+            d = data.get('d')
+            if not isinstance(d, list):
+                d = [d]
+            for s in d:
+                if s.get('oid') != oid:
+                    continue
+                try:
+                    v = int(float(s.get('value')))
+                except:
+                    continue
+                with cond:
+                    if v in sent:
+                        latencies.append(t - sent[v])
+                        received[v] = received.get(v, 0) + 1
+                        cond.notify_all()
+
+    try:
+        for i in range(k):
+            ws = websocket.create_connection(f'{uri}/ws?k={c._key}',
+                                             timeout=a.timeout)
+            ws.send(json.dumps({'s': 'state', 'i': [oid]}))
+            sockets.append(ws)
+            threading.Thread(target=listener, args=(ws,), daemon=True).start()
+        # let the server process subscriptions
+        time.sleep(1)
+        for i in range(1, iterations + 1):
+            with cond:
+                sent[i] = time.perf_counter()
+            api_call('uc', 'update', {'i': oid, 'v': i})
+            with cond:
+                if not cond.wait_for(lambda: received.get(i, 0) >= k,
+                                     timeout=a.timeout):
+                    raise BenchmarkFailed('timeout')
+            progress(i, iterations)
+        result = latency_stats(latencies)
+        result['ws_clients'] = k
+        result['iterations'] = iterations
+        return result
+    finally:
+        for ws in sockets:
+            try:
+                ws.close()
+            except:
+                pass
+        api_call('uc', 'destroy', {'i': oid}, eoe=False)
+
+
+def _prepare_lm_macro():
+    lvar_cnt = f'lvar:{BENCHMARK_GROUP}/eva_benchmark_cnt'
+    macro_id = f'{BENCHMARK_GROUP}/eva_benchmark_macro'
+    api_call('lm', 'destroy_macro', {'i': macro_id}, eoe=False)
+    api_call('lm', 'destroy', {'i': lvar_cnt}, eoe=False)
+    api_call('lm', 'create', {'i': lvar_cnt})
+    api_call('lm', 'set', {'i': lvar_cnt, 's': 1, 'v': 0})
+    api_call('lm', 'create_macro', {'i': macro_id})
+    api_call('lm', 'set_macro_prop', {
+        'i': macro_id,
+        'p': 'src',
+        'v': 'increment(\'{}\')\n'.format(lvar_cnt)
+    })
+    return lvar_cnt, macro_id
+
+
+def _cleanup_lm_macro(lvar_cnt, macro_id):
+    api_call('lm', 'destroy_macro', {'i': macro_id}, eoe=False)
+    api_call('lm', 'destroy', {'i': lvar_cnt}, eoe=False)
+
+
+def bench_dm():
+    """
+    decision matrix rule throughput: the rule matches every second lvar
+    change and runs the macro, which increments the counter lvar
+    """
+    iterations = a.iterations
+    lvar_in = f'lvar:{BENCHMARK_GROUP}/eva_benchmark_in'
+    lvar_cnt, macro_id = _prepare_lm_macro()
+    rule_id = None
+    try:
+        api_call('lm', 'destroy', {'i': lvar_in}, eoe=False)
+        api_call('lm', 'create', {'i': lvar_in})
+        api_call('lm', 'set', {'i': lvar_in, 's': 1, 'v': 0})
+        code, result = api_call(
+            'lm', 'create_rule', {
+                'v': f'if {lvar_in}.value > 0 then '
+                     f'{macro_id.rsplit("/", 1)[-1]}()',
+                'e': True
+            })
+        rule_id = result['id']
+        expected = 0
+        t_start = time.perf_counter()
+        for i in range(1, iterations + 1):
+            if i % 2:
+                api_call('lm', 'set', {'i': lvar_in, 'v': i})
+                expected += 1
+            else:
+                api_call('lm', 'set', {'i': lvar_in, 'v': 0})
+            progress(i, iterations)
+        t_end = wait_for(
+            lambda: float(item_value('lm', lvar_cnt) or 0) >= expected)
+        elapsed = t_end - t_start
+        return {
+            'iterations': iterations,
+            'rule_hits': expected,
+            'elapsed': elapsed,
+            'events_per_sec': iterations / elapsed,
+            'rule_hits_per_sec': expected / elapsed
+        }
+    finally:
+        if rule_id:
+            api_call('lm', 'destroy_rule', {'i': rule_id}, eoe=False)
+        api_call('lm', 'destroy', {'i': lvar_in}, eoe=False)
+        _cleanup_lm_macro(lvar_cnt, macro_id)
+
+
+def bench_macro():
+    """
+    macro execution rate: the macro is executed synchronously via API
+    """
+    iterations = a.iterations
+    lvar_cnt, macro_id = _prepare_lm_macro()
+    latencies = []
+    try:
+        params = {'i': macro_id, 'w': a.timeout}
+        t_start = time.perf_counter()
+        for i in range(1, iterations + 1):
+            t = time.perf_counter()
+            code, result = api_call('lm', 'run', params)
+            if result.get('status') != 'completed':
+                raise BenchmarkFailed('macro execution failed: {}'.format(
+                    result.get('status')))
+            latencies.append(time.perf_counter() - t)
+            progress(i, iterations)
+        elapsed = time.perf_counter() - t_start
+        result = latency_stats(latencies)
+        result['iterations'] = iterations
+        result['elapsed'] = elapsed
+        result['exec_per_sec'] = iterations / elapsed
+        return result
+    finally:
+        _cleanup_lm_macro(lvar_cnt, macro_id)
+
+
+def bench_history():
+    """
+    history query latency: sensor state history is queried from the DB
+    notifier (e.g. SQLite)
+    """
+    iterations = a.iterations
+    oid = f'sensor:{BENCHMARK_GROUP}/eva_benchmark_history'
+    api_call('uc', 'destroy', {'i': oid}, eoe=False)
+    api_call('uc', 'create', {'i': oid})
+    latencies = []
+    try:
+        for i in range(100):
+            api_call('uc', 'update', {'i': oid, 's': 1, 'v': i})
+        params = {'a': a.history_notifier, 'i': oid, 's': 0}
+        # check the notifier is available
+        api_call('uc', 'state_history', params)
+        for i in range(1, iterations + 1):
+            t = time.perf_counter()
+            api_call('uc', 'state_history', params)
+            latencies.append(time.perf_counter() - t)
+            progress(i, iterations)
+        result = latency_stats(latencies)
+        result['notifier'] = a.history_notifier
+        return result
+    finally:
+        api_call('uc', 'destroy', {'i': oid}, eoe=False)
+
+
+def bench_startup():
+    """
+    controller startup time: from the restart command to the first
+    successful API call
+    """
+    result = {}
+    for p in ['uc', 'lm', 'sfa']:
+        code, data = api_call(p, 'test', eoe=False)
+        if code != result_ok:
+            continue
+        result[p] = restart_controller(p, data.get('boot_id'))[1]
+    return result
+
+
+def bench_lanes():
+    """
+    item lanes scaling: units are created in steps, UC controller thread
+    count, RSS and stop/start time are measured for each item count
+    """
+    oids = []
+    result = {}
+
+    def collect(pfx):
+        # let the controller finish background tasks
+        time.sleep(1)
+        for k, v in proc_stats('uc').items():
+            result[f'{pfx}_{k}'] = v
+
+    try:
+        collect('items_0')
+        for n in lane_items:
+            t_start = time.perf_counter()
+            for x in range(len(oids), n):
+                oid = f'unit:{BENCHMARK_GROUP}/eva_benchmark_lane_{x}'
+                api_call('uc', 'destroy', {'i': oid}, eoe=False)
+                api_call('uc', 'create', {'i': oid, 'save': True})
+                oids.append(oid)
+                progress(x + 1, lane_items[-1])
+            result[f'items_{n}_create_time'] = time.perf_counter() - t_start
+            collect(f'items_{n}')
+            code, data = api_call('uc', 'test')
+            result[f'items_{n}_stop_time'], result[f'items_{n}_start_time'] = \
+                    restart_controller('uc', data.get('boot_id'))
+            collect(f'items_{n}_restarted')
+        return result
+    finally:
+        for oid in oids:
+            api_call('uc', 'destroy', {'i': oid}, eoe=False)
+
+
+def build_info():
+    info = {}
+    for p in ['uc', 'lm', 'sfa']:
+        try:
+            code, result = api_call(p, 'test', eoe=False)
+        except:
+            continue
+        if code == result_ok:
+            info[p] = {
+                'version': result.get('version'),
+                'product_build': result.get('product_build'),
+                'debug': result.get('debug'),
+                'db_update': result.get('db_update'),
+                'polldelay': result.get('polldelay')
+            }
+    return info
+
+
+def compare(report, fname):
+    with open(fname) as fh:
+        prev = json.load(fh)
+    print()
+    print('Comparison with {} (build {})'.format(
+        fname, {
+            k: v.get('product_build') for k, v in prev.get('builds', {}).items()
+        }))
+    for b, data in report['results'].items():
+        pdata = prev.get('results', {}).get(b)
+        if not isinstance(pdata, dict) or not isinstance(data, dict):
+            continue
+        for k, v in data.items():
+            pv = pdata.get(k)
+            if isinstance(v, (int, float)) and isinstance(pv, (int, float)) \
+                    and pv and not isinstance(v, bool):
+                diff = (v - pv) / pv * 100
+                print(f'  {b}.{k}: {pv:.6g} -> {v:.6g} ', end='')
+                cprint(f'({diff:+.1f}%)',
+                       color='cyan' if abs(diff) < 5 else 'yellow')
+
+
+print(_me)
+print()
+
+turn_debug = {}
+
+report = {
+    'suite_version': __version__,
+    'time': time.time(),
+    'host': {
+        'name': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count()
+    },
+    'params': {
+        'items': a.items,
+        'iterations': a.iterations,
+        'ws_clients': a.ws_clients,
+        'lane_items': lane_items
+    },
+    'builds': build_info(),
+    'results': {}
+}
+
+for p, info in report['builds'].items():
+    if info.get('debug'):
+        cprint(f'Disabling debug mode for {p}', '@debug')
+        api_call(p, 'set_debug', {'debug': False})
+        turn_debug[p] = True
+    if info.get('db_update') == 1:
+        cprint(
+            f'WARNING: {p} db_update is set to "instant"'
+            ', this may slow down core benchmark', '@warning')
+
+cprint('Starting. Please do not perform any API calls during core benchmark',
+       '@warning')
+
+failed = False
+
+for b in benchmarks:
+    print('Benchmark: ', end='')
+    cprint(b, color='cyan', attrs='bold')
+    try:
+        report['results'][b] = globals()[f'bench_{b}']()
+        cprint('\rcompleted', color='green', end=' ' * 20 + '\n')
+    except Exception as e:
+        failed = True
+        report['results'][b] = {'error': str(e)}
+        cprint(f'\rFAILED: {e}', '@error', end=' ' * 20 + '\n')
+
+for p in turn_debug:
+    print(f'Enabling debug mode back for {p}')
+    api_call(p, 'set_debug', {'debug': True}, eoe=False)
+
+output = json.dumps(report, indent=4, sort_keys=True)
+
+if a.output:
+    with open(a.output, 'w') as fh:
+        fh.write(output)
+    print(f'Report saved to {a.output}')
+else:
+    print(output)
+
+if a.compare:
+    compare(report, a.compare)
+
+sys.exit(4 if failed else 0)
@@ -894,20 +894,15 @@ class GenericAPI(API):
                 item_id = oid_to_id(i, rtp)
                 if item_id is None:
                     raise ResourceNotFound
-                ar = None
                 item = self.controller.get_item(rtp + ':' + item_id)
                 if not key_check(k, item, ro_op=True):
                     raise ResourceNotFound
                 if item_id.find('/') > -1:
-                    if item_id in self.controller.Q.actions_by_item_full_id:
-                        ar = self.controller.Q.actions_by_item_full_id[item_id]
+                    ar = self.controller.Q.history_list(item_full_id=item_id)
                 else:
-                    if item_id in self.controller.Q.actions_by_item_id:
-                        ar = self.controller.Q.actions_by_item_id[item_id]
-                if ar is None:
-                    return []
+                    ar = self.controller.Q.history_list(item_id=item_id)
             else:
-                ar = self.controller.Q.actions
+                ar = self.controller.Q.history_list()
             for a in ar:
                 if not key_check(k, a.item, ro_op=True):
                     continue
@@ -1738,7 +1733,12 @@ class GenericHTTP_API_abstract:
     def __call__(self, *args, **kwargs):
         func = self._get_api_function(args)
         if func:
-            return func(**kwargs)
+            t = time.perf_counter()
+            try:
+                return func(**kwargs)
+            finally:
+                eva.benchmark.observe('api', time.perf_counter() - t,
+                                      label=func.__name__)
         else:
             raise MethodNotFound
 
@@ -1851,7 +1851,13 @@ class JSON_RPC_API_abstract(GenericHTTP_API_abstract):
                             self._log_api_call(f, p, logging.info,
                                                self._fp_hide_in_log)
                             raise AccessDenied
-                    res = f(**p)
+                    t = time.perf_counter()
+                    try:
+                        res = f(**p)
+                    finally:
+                        eva.benchmark.observe('api',
+                                              time.perf_counter() - t,
+                                              label=method)
                 if isinstance(res, tuple):
                     res, data = res
                     if isinstance(res, bytes):
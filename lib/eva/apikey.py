@@ -28,6 +28,8 @@ from eva.tools import netacl_match
 from eva.tools import val_to_boolean
 from eva.tools import gen_random_str
 from eva.tools import SimpleNamespace
+from eva.tools import is_oid
+from eva.tools import parse_oid
 
 from eva.exceptions import ResourceAlreadyExists
 from eva.exceptions import ResourceNotFound
@@ -51,6 +53,9 @@ keys_to_delete = set()
 
 combined_keys_cache = {}
 
+# max visibility cache size (per key)
+acl_cache_max_size = 100000
+
 
 def mark_recombined_if_changed(f):
 
@@ -91,6 +96,8 @@ class APIKey(object):
         self.temporary = False
         self.combined_from = []
         self.need_recombine = False
+        self._acl = None
+        self._acl_gen = 0
         self.set_key(k)
 
     def serialize(self):
@@ -301,7 +308,28 @@ class APIKey(object):
                 return True
             raise ResourceNotFound('property ' + prop)
 
+    def get_acl(self):
+        """
+        get compiled item ACL, compile if required
+        """
+        acl = self._acl
+        if acl is None:
+            with key_lock:
+                acl = self._acl
+                if acl is None:
+                    gen = self._acl_gen
+                    acl = CompiledACL(self)
+                    # don't store ACL, compiled from outdated key props
+                    if gen == self._acl_gen:
+                        self._acl = acl
+        return acl
+
+    def invalidate_acl(self):
+        self._acl_gen += 1
+        self._acl = None
+
     def set_modified(self, save):
+        self.invalidate_acl()
         if save:
             self.save()
         else:
@@ -374,6 +402,130 @@ class APIKey(object):
         return True
 
 
+def _mask_match(g1, g2):
+    match = True
+    for i in range(0, len(g1)):
+        try:
+            if g1[i] == '#' and g2[i]:
+                break
+            elif g1[i] != '+' and g1[i] != g2[i]:
+                raise IndexError
+            g2[i]
+        except IndexError:
+            match = False
+            break
+    return match
+
+
+class ItemMatcher(object):
+    """
+    compiled item ids/groups matcher, equal to eva.item.item_match
+
+    Group masks are split once: exact groups are stored in hash sets, "#"
+    masks in prefix sets, indexed by prefix length
+    """
+
+    def __init__(self, item_ids, groups):
+        self.match_all = '#' in item_ids or '#' in groups
+        self.item_ids = frozenset(item_ids)
+        self.groups = frozenset(groups)
+        # item type (None for any) -> set of groups
+        self.exact = {}
+        # item type (None for any) -> {prefix length: set of prefixes}
+        self.prefixes = {}
+        # list of (item type, split mask)
+        self.masks = []
+        for grp in groups:
+            if is_oid(grp):
+                rt, g = parse_oid(grp)
+                if rt is None:
+                    continue
+            else:
+                rt = None
+                g = grp
+            self.exact.setdefault(rt, set()).add(g)
+            p = g.find('#')
+            if p > -1:
+                self.prefixes.setdefault(rt, {}).setdefault(p, set()).add(g[:p])
+            if '+' in g:
+                self.masks.append((rt, g.split('/')))
+
+    def match(self, item):
+        if self.match_all:
+            return True
+        grp = item.group
+        if grp in self.groups or item.oid in self.item_ids or (
+                not eva.core.config.enterprise_layout and
+                item.item_id in self.item_ids):
+            return True
+        for rt in (None, item.item_type):
+            exact = self.exact.get(rt)
+            if exact and grp in exact:
+                return True
+            prefixes = self.prefixes.get(rt)
+            if prefixes:
+                for l, p in prefixes.items():
+                    if grp[:l] in p:
+                        return True
+        if self.masks:
+            g2 = grp.split('/')
+            for rt, g1 in self.masks:
+                if rt is not None and rt != item.item_type:
+                    continue
+                if _mask_match(g1, g2):
+                    return True
+        return False
+
+
+class CompiledACL(object):
+    """
+    compiled API key item ACL with memoized item visibility
+
+    As the item match depends on item OID only, results are cached by OID.
+    The object is replaced when the key ACL is changed
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.rw = ItemMatcher(key.item_ids, key.groups)
+        self.ro = ItemMatcher(key.item_ids_ro, key.groups_ro)
+        self.deny = ItemMatcher(key.item_ids_deny, key.groups_deny)
+        self.has_deny = bool(key.item_ids_deny or key.groups_deny)
+        self.cache = {}
+        self.oid_cache = {}
+
+    def item_visible(self, item, ro_op=False):
+        ckey = (item.oid, ro_op)
+        try:
+            return self.cache[ckey]
+        except KeyError:
+            pass
+        if not ro_op and self.has_deny and self.deny.match(item):
+            result = False
+        elif self.rw.match(item):
+            result = True
+        else:
+            result = ro_op and self.ro.match(item)
+        if len(self.cache) >= acl_cache_max_size:
+            self.cache.clear()
+        self.cache[ckey] = result
+        return result
+
+    def oid_visible(self, oid, ro_op=False):
+        ckey = (oid, ro_op)
+        try:
+            return self.oid_cache[ckey]
+        except KeyError:
+            pass
+        k = self.key
+        result = eva.item.oid_match(oid, k.item_ids, k.groups) or (
+            ro_op and eva.item.oid_match(oid, k.item_ids_ro, k.groups_ro))
+        if len(self.oid_cache) >= acl_cache_max_size:
+            self.oid_cache.clear()
+        self.oid_cache[ckey] = result
+        return result
+
+
 def load(load_from_db=True):
     with key_lock:
         keys.clear()
@@ -540,27 +692,11 @@ def check(k,
                 return False
         except:
             # check access to regular item
-            try:
-                grp = item.group
-            except:
-                grp = 'nogroup'
-            if not ro_op and eva.item.item_match(item, _k.item_ids_deny,
-                                                 _k.groups_deny):
+            if not _k.get_acl().item_visible(item, ro_op):
                 return False
-            if not eva.item.item_match(item, _k.item_ids, _k.groups):
-                if ro_op:
-                    if not eva.item.item_match(item, _k.item_ids_ro,
-                                               _k.groups_ro):
-                        return False
-                else:
-                    return False
     if oid:
-        if not eva.item.oid_match(oid, _k.item_ids, _k.groups):
-            if ro_op:
-                if not eva.item.oid_match(oid, _k.item_ids_ro, _k.groups_ro):
-                    return False
-            else:
-                return False
+        if not _k.get_acl().oid_visible(oid, ro_op):
+            return False
     if allow:
         for a in allow:
             if not a in _k.allow:
@@ -712,6 +848,7 @@ def _recombine_acl(combined_key):
                     a = getattr(combined_key, prop)
                     if i not in a:
                         a.append(i)
+        combined_key.invalidate_acl()
         combined_key.need_recombine = False
 
 
@@ -1,5 +1,8 @@
 import time
 import logging
+import threading
+
+from functools import wraps
 
 intervals = {}
 
@@ -20,3 +23,220 @@ def report(s, i, end=False):
 
 def reset():
     intervals.clear()
+
+
+# hot-path latency histograms
+#
+# HDR-style log-linear buckets: values are recorded in microseconds, each
+# power of 2 is split into 2^HIST_SUB_BITS sub-buckets (~12% precision).
+# Every thread writes to its own counters only, counters are merged on read.
+
+HIST_SUB_BITS = 3
+HIST_SUB_COUNT = 1 << HIST_SUB_BITS
+HIST_MAX_SHIFT = 40
+HIST_BUCKETS = (HIST_MAX_SHIFT + 1) * HIST_SUB_COUNT
+
+# bucket bounds (seconds) for exposition
+HIST_EXPORT_LE = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05,
+                  0.1, 0.5, 1, 5, 10)
+
+histograms_enabled = True
+
+_hist_local = threading.local()
+_hist_stores = []
+_hist_retired = {}
+_hist_lock = threading.Lock()
+
+
+def _hist_bucket(us):
+    if us < HIST_SUB_COUNT:
+        return us if us > 0 else 0
+    shift = us.bit_length() - HIST_SUB_BITS - 1
+    idx = (shift + 1) * HIST_SUB_COUNT + (us >> shift) - HIST_SUB_COUNT
+    return idx if idx < HIST_BUCKETS else HIST_BUCKETS - 1
+
+
+def _hist_bucket_upper(idx):
+    """
+    exclusive upper bound of the bucket, microseconds
+    """
+    if idx < HIST_SUB_COUNT:
+        return idx + 1
+    shift = idx // HIST_SUB_COUNT - 1
+    return (idx % HIST_SUB_COUNT + HIST_SUB_COUNT + 1) << shift
+
+
+def _get_thread_store():
+    try:
+        return _hist_local.store
+    except AttributeError:
+        store = {}
+        _hist_local.store = store
+        with _hist_lock:
+            _hist_stores.append((threading.current_thread(), store))
+        return store
+
+
+def observe(name, duration, label=None):
+    """
+    record duration (seconds) to the histogram
+
+    Args:
+        name: histogram name
+        duration: duration in seconds
+        label: optional label (e.g. notifier id or API method)
+    """
+    if not histograms_enabled:
+        return
+    store = _get_thread_store()
+    key = (name, label)
+    try:
+        h = store[key]
+    except KeyError:
+        h = [0, 0, 0, {}]
+        store[key] = h
+    us = int(duration * 1000000)
+    # count, sum (us), max (us), buckets
+    h[0] += 1
+    h[1] += us
+    if us > h[2]:
+        h[2] = us
+    b = h[3]
+    idx = _hist_bucket(us)
+    b[idx] = b.get(idx, 0) + 1
+
+
+def timed(name):
+    """
+    decorator to measure function execution time
+    """
+
+    def wrapper(f):
+
+        @wraps(f)
+        def do(*args, **kwargs):
+            if not histograms_enabled:
+                return f(*args, **kwargs)
+            t = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - t)
+
+        return do
+
+    return wrapper
+
+
+def _merge_hist(dst, key, h):
+    try:
+        d = dst[key]
+    except KeyError:
+        d = [0, 0, 0, {}]
+        dst[key] = d
+    d[0] += h[0]
+    d[1] += h[1]
+    if h[2] > d[2]:
+        d[2] = h[2]
+    b = d[3]
+    for idx, c in h[3].copy().items():
+        b[idx] = b.get(idx, 0) + c
+
+
+def _collect():
+    result = {}
+    with _hist_lock:
+        alive = []
+        for t, store in _hist_stores:
+            if t.is_alive():
+                alive.append((t, store))
+            else:
+                for key, h in store.copy().items():
+                    _merge_hist(_hist_retired, key, h)
+        _hist_stores[:] = alive
+        for key, h in _hist_retired.items():
+            _merge_hist(result, key, h)
+    for t, store in alive:
+        for key, h in store.copy().items():
+            _merge_hist(result, key, h)
+    return result
+
+
+def _percentile(h, p):
+    need = h[0] * p / 100
+    n = 0
+    for idx in sorted(h[3]):
+        n += h[3][idx]
+        if n >= need:
+            return min(_hist_bucket_upper(idx), h[2]) / 1000000
+    return h[2] / 1000000
+
+
+def reset_histograms():
+    with _hist_lock:
+        _hist_retired.clear()
+        for t, store in _hist_stores:
+            for h in store.copy().values():
+                h[0] = 0
+                h[1] = 0
+                h[2] = 0
+                h[3].clear()
+
+
+def serialize_histograms():
+    """
+    get merged histograms stats
+
+    Returns:
+        list of dicts with count, avg, max and percentiles (seconds)
+    """
+    result = []
+    for (name, label), h in sorted(_collect().items(),
+                                   key=lambda v: (v[0][0], v[0][1] or '')):
+        if not h[0]:
+            continue
+        d = {'name': name}
+        if label is not None:
+            d['label'] = label
+        d.update({
+            'count': h[0],
+            'avg': h[1] / h[0] / 1000000,
+            'p50': _percentile(h, 50),
+            'p90': _percentile(h, 90),
+            'p99': _percentile(h, 99),
+            'p999': _percentile(h, 99.9),
+            'max': h[2] / 1000000
+        })
+        result.append(d)
+    return result
+
+
+def format_histograms_prometheus(prefix='eva_latency_seconds'):
+    """
+    format histograms in Prometheus text exposition format
+    """
+    result = []
+    hists = sorted(_collect().items(), key=lambda v: (v[0][0], v[0][1] or ''))
+    if not hists:
+        return result
+    result.append(f'# HELP {prefix} EVA ICS hot-path latency')
+    result.append(f'# TYPE {prefix} histogram')
+    for (name, label), h in hists:
+        labels = 'op="{}"'.format(name)
+        if label is not None:
+            labels += ',label="{}"'.format(
+                str(label).replace('\\', '\\\\').replace('"', '\\"'))
+        buckets = sorted(h[3].items())
+        pos = 0
+        n = 0
+        for le in HIST_EXPORT_LE:
+            le_us = le * 1000000
+            while pos < len(buckets) and \
+                    _hist_bucket_upper(buckets[pos][0]) <= le_us:
+                n += buckets[pos][1]
+                pos += 1
+            result.append(f'{prefix}_bucket{{{labels},le="{le}"}} {n}')
+        result.append(f'{prefix}_bucket{{{labels},le="+Inf"}} {h[0]}')
+        result.append(f'{prefix}_sum{{{labels}}} {h[1] / 1000000}')
+        result.append(f'{prefix}_count{{{labels}}} {h[0]}')
+    return result
@@ -205,6 +205,10 @@ class GenericCLI(GCLI):
                 ],
                 'get_exceptions': [
                     'time', 'level', 'class', 'message', 'trace'
+                ],
+                'get_latency_stats': [
+                    'name', 'label', 'count', 'avg', 'p50', 'p90', 'p99',
+                    'p999', 'max'
                 ]
             }
             self.arg_sections = ['log', 'cvar', 'file', 'key', 'user']
@@ -2049,6 +2053,13 @@ class ControllerCLI(object):
                 metavar='CODE')
             ap_profile = sp_controller.add_parser('exceptions',
                                                   help='Get server exceptions')
+            ap_latency = sp_controller.add_parser(
+                'latency', help='Get server hot-path latency stats')
+            ap_latency.add_argument('-r',
+                                    '--reset',
+                                    help='Reset stats after reading',
+                                    dest='r',
+                                    action='store_true')
         ap_status = sp_controller.add_parser(
             'status', help='Status of the controller server')
         ap_launch = sp_controller.add_parser(
@@ -2202,6 +2213,7 @@ class ControllerCLI(object):
             'server:status': self.status_controller,
             'server:exec-code': 'exec_code',
             'server:exceptions': 'get_exceptions',
+            'server:latency': 'get_latency_stats',
             'server:reload': 'shutdown_core',
             'server:profile': self.profile_controller,
             'server:launch': self.launch_controller,
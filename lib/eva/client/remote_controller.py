@@ -19,6 +19,7 @@ import rapidjson
 import msgpack
 import uuid
 import random
+import bisect
 from eva.client import apiclient
 from neotasker import BackgroundIntervalWorker, BackgroundWorker
 from eva.types import CT_JSON, CT_MSGPACK
@@ -832,6 +833,87 @@ class RemoteLM(RemoteController):
             return None
 
 
+class RemoteItemIndex(dict):
+    """
+    Remote items dict, which keeps item ids sorted and items indexed by group
+
+    Indexes are updated on item append/removal, so state queries don't need
+    to sort the whole inventory
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+        self._sorted_ids = []
+        self._sorted_items = []
+        self._groups = {}
+
+    def __setitem__(self, key, item):
+        with self._lock:
+            if key in self:
+                self._unindex(key)
+            idx = bisect.bisect_left(self._sorted_ids, key)
+            self._sorted_ids.insert(idx, key)
+            self._sorted_items.insert(idx, item)
+            self._groups.setdefault(item.group, {})[key] = item
+            super().__setitem__(key, item)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._unindex(key)
+            super().__delitem__(key)
+
+    def _unindex(self, key):
+        item = self[key]
+        idx = bisect.bisect_left(self._sorted_ids, key)
+        del self._sorted_ids[idx]
+        del self._sorted_items[idx]
+        g = self._groups.get(item.group)
+        if g is not None:
+            g.pop(key, None)
+            if not g:
+                del self._groups[item.group]
+
+    def pop(self, key, *args):
+        with self._lock:
+            if key in self:
+                item = self[key]
+                del self[key]
+                return item
+            return super().pop(key, *args)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._sorted_ids.clear()
+            self._sorted_items.clear()
+            self._groups.clear()
+
+    def sorted_items(self):
+        """
+        get items, sorted by id
+        """
+        with self._lock:
+            return self._sorted_items.copy()
+
+    def groups(self):
+        """
+        get list of groups
+        """
+        with self._lock:
+            return list(self._groups)
+
+    def group_items(self, group):
+        """
+        get items of the group
+        """
+        with self._lock:
+            try:
+                return list(self._groups[group].values())
+            except KeyError:
+                return []
+
+
 class RemoteControllerPool(object):
 
     def __init__(self, id=None):
@@ -1174,10 +1256,10 @@ class RemoteUCPool(RemoteControllerPool):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.ctype = 'uc'
-        self.units = {}
+        self.units = RemoteItemIndex()
         self.units_by_controller = {}
         self.controllers_by_unit = {}
-        self.sensors = {}
+        self.sensors = RemoteItemIndex()
         self.sensors_by_controller = {}
 
     def process_state(self, states, controller):
@@ -1618,7 +1700,7 @@ class RemoteLMPool(RemoteControllerPool):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.ctype = 'lm'
-        self.lvars = {}
+        self.lvars = RemoteItemIndex()
         self.lvars_by_controller = {}
         self.controllers_by_lvar = {}
 
@@ -16,6 +16,8 @@ import time
 class RemoteUpdatableItem(eva.item.UpdatableItem):
 
     def __init__(self, item_type, controller, state, **kwargs):
+        # serialized state cache, cleared on any attribute change
+        self.__dict__['_serialized'] = {}
         item_id = state['id']
         super().__init__(item_id, item_type, **kwargs)
         self.controller = controller
@@ -32,6 +34,11 @@ class RemoteUpdatableItem(eva.item.UpdatableItem):
         self.allow_mqtt_updates_from_controllers = True
         self.remote_update_lock = threading.RLock()
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if self._serialized:
+            self.__dict__['_serialized'] = {}
+
     def notify(self,
                retain=None,
                skip_subscribed_mqtt=False,
@@ -57,11 +64,19 @@ class RemoteUpdatableItem(eva.item.UpdatableItem):
                   info=False,
                   props=False,
                   notify=False):
-        d = super().serialize(full=full,
-                              config=config,
-                              info=info,
-                              props=props,
-                              notify=notify)
+        if config or info or props or notify:
+            d = super().serialize(full=full,
+                                  config=config,
+                                  info=info,
+                                  props=props,
+                                  notify=notify)
+        else:
+            try:
+                d = self._serialized[full].copy()
+            except KeyError:
+                sd = super().serialize(full=full)
+                self._serialized[full] = sd
+                d = sd.copy()
         d['controller_id'] = self.controller.full_id
         connected = self.controller.connected if \
                 self.controller.enabled else False
@@ -107,10 +107,13 @@ config = SimpleNamespace(pid_file=None,
                          dump_on_critical=True,
                          polldelay=0.01,
                          db_update=0,
+                         db_pool_recycle=3600,
                          keep_action_history=3600,
                          action_cleaner_interval=60,
                          notify_on_start=True,
                          keep_logmem=3600,
+                         keep_logmem_records=50000,
+                         log_notify_interval=0.1,
                          default_log_level_name='info',
                          default_log_level_id=20,
                          default_log_level=logging.INFO,
@@ -375,6 +378,8 @@ def create_db_engine(db_uri, timeout=None):
 
     - database timeout is set to core timeout, if not specified
     - database pool size is auto-configured
+    - for all engines, except SQLite, connections are checked with pre-ping
+      on pool checkout and recycled after server/db-pool-recycle seconds
     - for all engines, except SQLite, "READ UNCOMMITED" isolation level is used
     """
     if not db_uri:
@@ -387,6 +392,8 @@ def create_db_engine(db_uri, timeout=None):
         return sa.create_engine(db_uri,
                                 pool_size=db_pool_size,
                                 max_overflow=db_pool_size * 2,
+                                pool_pre_ping=True,
+                                pool_recycle=config.db_pool_recycle,
                                 isolation_level='READ UNCOMMITTED')
 
 
@@ -610,6 +617,8 @@ def serialize(full=False):
     d['product_code'] = product.code
     d['product_build'] = product.build
     d['keep_logmem'] = config.keep_logmem
+    d['keep_logmem_records'] = config.keep_logmem_records
+    d['log_notify_interval'] = config.log_notify_interval
     d['keep_api_log'] = config.keep_api_log
     d['keep_action_history'] = config.keep_action_history
     d['action_cleaner_interval'] = config.action_cleaner_interval
@@ -623,6 +632,7 @@ def serialize(full=False):
     d['env'] = env
     d['polldelay'] = config.polldelay
     d['db_update'] = config.db_update
+    d['db_pool_recycle'] = config.db_pool_recycle
     d['notify_on_start'] = config.notify_on_start
     d['dir_eva'] = dir_eva
     d['db_uri'] = config.db_uri
@@ -767,6 +777,16 @@ def load(initial=False, init_log=True, check_pid=True, omit_plugins=False):
             config.log_stdout = cfg.get('server/log-stdout')
         except LookupError:
             pass
+        try:
+            config.keep_logmem_records = int(
+                cfg.get('server/keep-logmem-records'))
+        except LookupError:
+            pass
+        try:
+            config.log_notify_interval = float(
+                cfg.get('server/log-notify-interval'))
+        except LookupError:
+            pass
         if init_log:
             init_logs()
         try:
@@ -845,6 +865,12 @@ def load(initial=False, init_log=True, check_pid=True, omit_plugins=False):
                 db_uri = db_file
         config.db_uri = format_db_uri(db_uri)
         logging.debug(f'server.db = {config.db_uri}')
+        try:
+            config.db_pool_recycle = float(cfg.get('server/db-pool-recycle'))
+        except LookupError:
+            pass
+        logging.debug(
+            f'server.db_pool_recycle = {config.db_pool_recycle} sec')
         try:
             userdb_file = cfg.get('server/userdb-file')
             secure_file(userdb_file)
@@ -935,6 +961,10 @@ def load(initial=False, init_log=True, check_pid=True, omit_plugins=False):
     except:
         pass
     logging.debug('server.keep_logmem = %s sec' % config.keep_logmem)
+    logging.debug(
+        f'server.keep_logmem_records = {config.keep_logmem_records}')
+    logging.debug(
+        f'server.log_notify_interval = {config.log_notify_interval} sec')
     try:
         config.keep_api_log = int(cfg.get('server/keep-api-log'))
     except:
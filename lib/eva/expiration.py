@@ -0,0 +1,126 @@
+__author__ = "Altertech Group, https://www.altertech.com/"
+__copyright__ = "Copyright (C) 2012-2021 Altertech Group"
+__license__ = "Apache License 2.0"
+__version__ = "3.4.2"
+
+# item expiration tracker
+#
+# expiring items are kept in a timing wheel. State updates only write the item
+# state timestamp, the item stays in its slot. When the slot is due, the
+# dispatcher re-checks item deadlines: items, updated in the meantime, are
+# moved to the slot of their new deadline, expired ones are passed to
+# set_expired in a batch.
+
+import threading
+import logging
+import time
+
+import eva.core
+
+from eva.tools import SimpleNamespace
+
+TICK = 0.05
+WHEEL_SIZE = 2048
+
+_d = SimpleNamespace(slots=[set() for _ in range(WHEEL_SIZE)],
+                     cur=int(time.perf_counter() / TICK),
+                     cond=threading.Condition(),
+                     thread=None,
+                     active=False)
+
+
+def _insert(item, deadline):
+    tick = max(int(deadline / TICK) + 1, _d.cur + 1)
+    slot = tick % WHEEL_SIZE
+    _d.slots[slot].add(item)
+    item._expiration_slot = slot
+
+
+def track(item):
+    """
+    start tracking item expiration
+
+    The item deadline is state_set_time + expires, the item is expired if
+    expiration_armed() returns True when the deadline is reached
+    """
+    with _d.cond:
+        if item._expiration_slot is not None:
+            return
+        _insert(item, item.state_set_time + item.expires)
+        if not _d.active:
+            _d.active = True
+            _d.cur = int(time.perf_counter() / TICK)
+            _d.thread = threading.Thread(target=_t_dispatcher,
+                                         name='expiration_dispatcher',
+                                         daemon=True)
+            _d.thread.start()
+
+
+def untrack(item):
+    """
+    stop tracking item expiration
+    """
+    with _d.cond:
+        if item._expiration_slot is not None:
+            _d.slots[item._expiration_slot].discard(item)
+            item._expiration_slot = None
+
+
+def _process_slot(tick, now):
+    slot = _d.slots[tick % WHEEL_SIZE]
+    if not slot:
+        return ()
+    expired = []
+    items = list(slot)
+    slot.clear()
+    for item in items:
+        item._expiration_slot = None
+        expires = item.expires
+        if not expires:
+            continue
+        deadline = item.state_set_time + expires
+        if deadline > now:
+            _insert(item, deadline)
+        elif item.expiration_armed():
+            expired.append(item)
+    return expired
+
+
+def _set_expired(items):
+    for item in items:
+        try:
+            # the item could be updated after it has been taken from the slot
+            if item.is_destroyed() or not item.expires or \
+                    time.perf_counter() - item.state_set_time <= item.expires:
+                continue
+            logging.debug(f'{item.oid} expired, resetting status/value')
+            item.set_expired()
+        except:
+            eva.core.log_traceback()
+
+
+def _t_dispatcher():
+    logging.debug('expiration dispatcher started')
+    while True:
+        with _d.cond:
+            if not _d.active:
+                break
+            _d.cond.wait(timeout=(_d.cur + 1) * TICK - time.perf_counter())
+            if not _d.active:
+                break
+            now = time.perf_counter()
+            now_tick = int(now / TICK)
+            expired = []
+            while _d.cur < now_tick:
+                _d.cur += 1
+                expired += _process_slot(_d.cur, now)
+        if expired:
+            eva.core.spawn(_set_expired, expired)
+    logging.debug('expiration dispatcher stopped')
+
+
+@eva.core.stop
+def stop():
+    with _d.cond:
+        _d.active = False
+        _d.cond.notify()
@@ -8,13 +8,16 @@ import os
 import threading
 import time
 import uuid
-import queue
 import logging
 import rapidjson
 import eva.registry
 
 import eva.core
 import eva.notify
+import eva.benchmark
+import eva.pollscheduler
+import eva.lanes
+import eva.expiration
 
 from eva.tools import format_json
 from eva.tools import val_to_boolean
@@ -43,8 +46,22 @@ from eva.generic import ia_status_failed
 from eva.generic import ia_status_terminated
 from eva.generic import ia_status_completed
 
-from neotasker import task_supervisor
-from neotasker import BackgroundEventWorker, BackgroundQueueWorker
+# per-thread notification batch, see MultiUpdate.update_after_run
+_notify_batch = threading.local()
+
+
+def batch_notify(item):
+    """
+    put item notification into the current thread batch
+
+    Returns:
+        True if the batch is active and the item is put, False if not
+    """
+    batch = getattr(_notify_batch, 'items', None)
+    if batch is None:
+        return False
+    batch[item] = None
+    return True
 
 
 class Item(object):
@@ -146,6 +163,8 @@ class Item(object):
                for_destroy=False):
         if not self.notify_events:
             return
+        if not for_destroy and batch_notify(self):
+            return
         try:
             if skip_subscribed_mqtt:
                 s = self
@@ -321,15 +340,12 @@ class UpdatableItem(Item):
         self.update_delay = 0
         self.update_timeout = eva.core.config.timeout
         self._update_timeout = None
-        self.update_processor = BackgroundEventWorker(
-            o=self,
-            on_error=eva.core.log_traceback,
-            fn=self._run_update_processor)
+        self.update_processor = eva.lanes.UpdateLane(self._perform_update)
         self.update_lock = threading.RLock()
         self.update_scheduler = None
         self.update_scheduler_lock = threading.Lock()
-        self.expiration_checker = None
-        self.expiration_checker_lock = threading.Lock()
+        # set by eva.expiration
+        self._expiration_slot = None
         self._updates_allowed = True
         self.update_xc = None
         # default status: 0 - off, 1 - on, -1 - error
@@ -559,35 +575,39 @@ class UpdatableItem(Item):
         with self.update_scheduler_lock:
             if self.update_interval:
                 if self.update_scheduler:
-                    self.update_scheduler.cancel()
+                    eva.pollscheduler.unregister(self.update_scheduler)
                     self.update_scheduler = None
-                self.update_scheduler = task_supervisor.create_async_job(
-                    target=self._job_update_scheduler,
-                    interval=self.update_interval)
+                self.update_scheduler = eva.pollscheduler.register(
+                    self.oid,
+                    self.update_interval,
+                    self._poll_update,
+                    group=self.get_poll_group(),
+                    state_fn=self._poll_state)
 
     def stop_update_scheduler(self):
         with self.update_scheduler_lock:
             if self.update_scheduler:
-                self.update_scheduler.cancel()
+                eva.pollscheduler.unregister(self.update_scheduler)
                 self.update_scheduler = None
 
+    def get_poll_group(self):
+        """
+        items of the same poll group are updated in one transaction window
+        """
+        return None
+
     def start_expiration_checker(self):
-        with self.expiration_checker_lock:
-            if self.expires and self.status != -1 and \
-                    (self.status != 0 or self._expire_on_any):
-                if self.expiration_checker:
-                    self.expiration_checker.cancel()
-                    self.expiration_checker = None
-                self.expiration_checker = task_supervisor.create_async_job(
-                    target=self._job_expiration_checker,
-                    timer=self.expires,
-                    number=1)
+        # the item may be in the slot of the previous deadline
+        eva.expiration.untrack(self)
+        if self.expires:
+            self.state_set_time = time.perf_counter()
+            eva.expiration.track(self)
 
     def stop_expiration_checker(self):
-        with self.expiration_checker_lock:
-            if self.expiration_checker:
-                self.expiration_checker.cancel()
-                self.expiration_checker = None
+        eva.expiration.untrack(self)
+
+    def expiration_armed(self):
+        return self.status != -1 and (self.status != 0 or self._expire_on_any)
 
     def updates_allowed(self):
         return self._updates_allowed
@@ -602,10 +622,6 @@ class UpdatableItem(Item):
     def update_run_args(self):
         return ()
 
-    async def _job_expiration_checker(self):
-        logging.debug(f'{self.oid} expired, resetting status/value')
-        self.set_expired()
-
     def is_expired(self):
         return time.perf_counter() - self.state_set_time > self.expires \
                 if self.expires else False
@@ -620,9 +636,6 @@ class UpdatableItem(Item):
         if self.updates_allowed() and not self.is_destroyed():
             self.update_processor.trigger()
 
-    async def _run_update_processor(self, **kwargs):
-        eva.core.spawn(self._perform_update, **kwargs)
-
     def _perform_update(self, **kwargs):
         logging.debug('updating {}'.format(self.oid))
         try:
@@ -645,18 +658,21 @@ class UpdatableItem(Item):
             logging.error('update %s failed' % self.oid)
             eva.core.log_traceback()
 
-    async def _job_update_scheduler(self):
+    def _poll_update(self):
         if self.updates_allowed():
             logging.debug('{} scheduling update'.format(self.oid))
-            await self.update_processor.trigger()
+            self.update_processor.trigger_threadsafe()
+
+    def _poll_state(self):
+        return (self.status, self.value)
 
     def get_update_xc(self, **kwargs):
-        return eva.runner.ExternalProcess(fname=self.update_exec,
-                                          item=self,
-                                          env=self.update_env(),
-                                          update=True,
-                                          args=self.update_run_args(),
-                                          timeout=self.update_timeout)
+        return eva.runner.get_xc(fname=self.update_exec,
+                                 item=self,
+                                 env=self.update_env(),
+                                 update=True,
+                                 args=self.update_run_args(),
+                                 timeout=self.update_timeout)
 
     def update_env(self):
         return {}
@@ -669,7 +685,8 @@ class UpdatableItem(Item):
 
     def update_expiration(self):
         self.state_set_time = time.perf_counter()
-        self.start_expiration_checker()
+        if self.expires and self._expiration_slot is None:
+            eva.expiration.track(self)
 
     def update_after_run(self, update_out):
         if self._destroyed or update_out is False:
@@ -748,6 +765,7 @@ class UpdatableItem(Item):
         except:
             eva.core.log_traceback()
 
+    @eva.benchmark.timed('update_set_state')
     def update_set_state(self,
                          status=None,
                          value=None,
@@ -862,7 +880,6 @@ class ActiveItem(Item):
 
     def __init__(self, item_id=None, item_type=None, **kwargs):
         super().__init__(item_id, item_type, **kwargs)
-        self.queue = queue.PriorityQueue()
         self.current_action = None
         self.action_enabled = False
         # 0 - disallow queue, 1 - allow queue
@@ -875,10 +892,8 @@ class ActiveItem(Item):
         self.term_kill_interval = eva.core.config.timeout
         self._term_kill_interval = None
         self.queue_lock = threading.RLock()
-        self.action_processor = BackgroundQueueWorker(
-            fn=self._run_action_processor, on_error=eva.core.log_traceback)
-        self.action_processor.before_queue_get = self.action_before_get_task
-        self.action_processor.after_queue_get = self.action_after_get_task
+        self.action_processor = eva.lanes.ActionLane(
+            self._run_action_processor)
         self.current_action = None
         self.action_xc = None
         self.mqtt_control = None
@@ -887,13 +902,13 @@ class ActiveItem(Item):
         self._expire_on_any = True
 
     def q_is_task(self):
-        return not self.queue.empty()
+        return not self.action_processor.empty()
 
     def q_get_task(self, timeout=None):
-        return self.queue.get(timeout=timeout)
+        return self.action_processor.get_nowait()
 
     def q_get_task_nowait(self):
-        return self.queue.get_nowait()
+        return self.action_processor.get_nowait()
 
     def q_put_task(self, action):
         if self.action_queue == 2:
@@ -911,7 +926,7 @@ class ActiveItem(Item):
                 return False
             if action.item and not action.set_queued():
                 return False
-            self.action_processor.put_threadsafe(action)
+            self.action_processor.put(action)
             return True
         finally:
             self.queue_lock.release()
@@ -1025,12 +1040,6 @@ class ActiveItem(Item):
     def action_run_args(self, action):
         return ()
 
-    def action_before_get_task(self):
-        pass
-
-    def action_after_get_task(self, action):
-        pass
-
     def action_before_run(self, action):
         pass
 
@@ -1059,9 +1068,8 @@ class ActiveItem(Item):
                 # dirty fix for action_queue == 2
                 elif self.action_queue == 2:
                     while self.q_is_task():
+                        a.set_canceled()
                         a = self.q_get_task()
-                        if self.q_is_task():
-                            a.set_canceled()
                 # end
                 self.current_action = a
                 if not self.action_enabled:
@@ -1121,13 +1129,13 @@ class ActiveItem(Item):
             self.queue_lock.release()
 
     def get_action_xc(self, a):
-        return eva.runner.ExternalProcess(fname=self.action_exec,
-                                          item=self,
-                                          env=a.action_env(),
-                                          update=False,
-                                          args=self.action_run_args(a),
-                                          timeout=self.action_timeout,
-                                          tki=self.term_kill_interval)
+        return eva.runner.get_xc(fname=self.action_exec,
+                                 item=self,
+                                 env=a.action_env(),
+                                 update=False,
+                                 args=self.action_run_args(a),
+                                 timeout=self.action_timeout,
+                                 tki=self.term_kill_interval)
 
     def update_config(self, data):
         if 'action_enabled' in data:
@@ -1527,6 +1535,7 @@ class MultiUpdate(UpdatableItem):
     def __init__(self, mu_id=None, **kwargs):
         super().__init__(mu_id, 'mu', **kwargs)
         self.items_to_update = []
+        self._items_to_update_oids = set()
         self._update_run_args = ()
         self.update_allow_check = True
         self.get_item_func = None
@@ -1543,34 +1552,62 @@ class MultiUpdate(UpdatableItem):
     def update_after_run(self, update_out):
         if self._destroyed:
             return
+        items = self.items_to_update
         if isinstance(update_out, str):
-            result = update_out.strip().split('\n')
+            result = update_out.strip().split('\n', len(items))
         elif isinstance(update_out, list):
             result = update_out
         else:
             result = [update_out]
-        if len(result) < len(self.items_to_update):
+        if len(result) < len(items):
             logging.warning(
                     '%s have %u items to update, got only %u in result' % \
-                    (self.oid, len(self.items_to_update),
+                    (self.oid, len(items),
                         len(result)))
-        for i in range(0, min(len(result), len(self.items_to_update))):
-            self.items_to_update[i].update_after_run(result[i])
+        # item notifications are collected and sent as a single batch
+        _notify_batch.items = batch = {}
+        try:
+            for item, r in zip(items, result):
+                try:
+                    item.update_after_run(r)
+                except:
+                    eva.core.log_traceback()
+        finally:
+            _notify_batch.items = None
+        if batch:
+            self.notify_items(list(batch))
+
+    def notify_items(self, items):
+        """
+        notify about state of the updated items
+        """
+        try:
+            data = [(i, i.serialize(notify=True))
+                    for i in items
+                    if i.notify_events]
+            if data:
+                eva.notify.notify('state', data=data)
+        except:
+            eva.core.log_traceback()
 
     def update_config(self, data):
         super().update_config(data)
         if 'update_allow_check' in data:
             self.update_allow_check = data['update_allow_check']
         if 'items' in data:
+            items = self.items_to_update.copy()
+            oids = self._items_to_update_oids.copy()
             for i in data['items']:
                 item = self.get_item_func(i)
                 if item:
-                    self.append(item)
-                    pass
+                    if item.oid not in oids:
+                        items.append(item)
+                        oids.add(item.oid)
                 else:
                     logging.warning(
                             '%s can not add %s, item not found' % \
                                     (self.oid, i))
+            self.set_items(items)
 
     def set_prop(self, prop, val=None, save=False):
         if prop == 'update_allow_check':
@@ -1586,24 +1623,36 @@ class MultiUpdate(UpdatableItem):
         else:
             return super().set_prop(prop, val, save)
 
+    def has_item(self, item):
+        return item.oid in self._items_to_update_oids
+
     def append(self, item):
-        if not item in self.items_to_update:
-            self.items_to_update.append(item)
-            self.set_update_run_args()
+        if item.oid not in self._items_to_update_oids:
+            self.set_items(self.items_to_update + [item])
             return True
         else:
             return False
 
     def remove(self, item):
-        if not item in self.items_to_update:
+        if item.oid not in self._items_to_update_oids:
             logging.debug(
                 '%s can not remove %s, doesn\'t exist in the update list' % \
                                 (self.oid, item.full_id))
             return False
-        self.items_to_update.remove(item)
-        self.set_update_run_args()
+        self.set_items([i for i in self.items_to_update if i is not item])
         return True
 
+    def set_items(self, items):
+        """
+        set items to update
+
+        The list is replaced as a whole, so update_after_run, running in
+        parallel, works with a consistent snapshot
+        """
+        self.items_to_update = items
+        self._items_to_update_oids = {i.oid for i in items}
+        self.set_update_run_args()
+
     def update_run_args(self):
         return self._update_run_args
 
@@ -1645,6 +1694,7 @@ class MultiUpdate(UpdatableItem):
 
 class VariableItem(UpdatableItem):
 
+    @eva.benchmark.timed('update_set_state')
     def update_set_state(self,
                          status=None,
                          value=None,
@@ -10,6 +10,8 @@ import eva.core
 import eva.item
 import time
 import asyncio
+import heapq
+import itertools
 
 from neotasker import BackgroundIntervalWorker, BackgroundQueueWorker
 
@@ -25,10 +27,13 @@ class ActiveItemQueue(object):
         self.q_id = queue_id
         self.keep_history = keep_history
 
-        self.actions = []
+        # action history, insertion-ordered dicts uuid: action
         self.actions_by_id = {}
         self.actions_by_item_id = {}
         self.actions_by_item_full_id = {}
+        # expiration heap (expires, seq, uuid)
+        self.actions_expiration = []
+        self._expiration_seq = itertools.count()
 
         self.actions_lock = threading.RLock()
 
@@ -58,8 +63,9 @@ class ActiveItemQueue(object):
             eva.core.critical()
             return
         try:
-            _actions = self.actions.copy()
+            _actions = list(self.actions_by_id.values())
         except:
+            _actions = []
             eva.core.log_traceback()
         finally:
             self.actions_lock.release()
@@ -67,6 +73,23 @@ class ActiveItemQueue(object):
             d.append(a.serialize())
         return d
 
+    def history_list(self, item_id=None, item_full_id=None):
+        """
+        get list of actions in history
+
+        Args:
+            item_id: filter by item id
+            item_full_id: filter by item full id
+        """
+        with self.actions_lock:
+            if item_full_id is not None:
+                actions = self.actions_by_item_full_id.get(item_full_id, {})
+            elif item_id is not None:
+                actions = self.actions_by_item_id.get(item_id, {})
+            else:
+                actions = self.actions_by_id
+            return list(actions.values())
+
     def history_get(self, action_uuid):
         try:
             if action_uuid in self.actions_by_id:
@@ -80,13 +103,15 @@ class ActiveItemQueue(object):
             eva.core.critical()
             return False
         try:
-            self.actions.append(action)
             self.actions_by_id[action.uuid] = action
             if not self.enterprise_layout:
                 self.actions_by_item_id.setdefault(action.item.item_id,
-                                                   []).append(action)
+                                                   {})[action.uuid] = action
             self.actions_by_item_full_id.setdefault(action.item.full_id,
-                                                    []).append(action)
+                                                    {})[action.uuid] = action
+            heapq.heappush(self.actions_expiration,
+                           (time.time() + self.keep_history,
+                            next(self._expiration_seq), action.uuid))
             return True
         except:
             eva.core.log_traceback()
@@ -100,11 +125,12 @@ class ActiveItemQueue(object):
             eva.core.critical()
             return False
         try:
-            if not self.enterprise_layout:
-                self.actions_by_item_id[action.item.item_id].remove(action)
-            self.actions_by_item_full_id[action.item.full_id].remove(action)
-            self.actions.remove(action)
             del self.actions_by_id[action.uuid]
+            if not self.enterprise_layout:
+                self._history_index_remove(self.actions_by_item_id,
+                                           action.item.item_id, action)
+            self._history_index_remove(self.actions_by_item_full_id,
+                                       action.item.full_id, action)
             return True
         except:
             eva.core.log_traceback()
@@ -112,6 +138,35 @@ class ActiveItemQueue(object):
         finally:
             self.actions_lock.release()
 
+    @staticmethod
+    def _history_index_remove(index, key, action):
+        actions = index[key]
+        del actions[action.uuid]
+        if not actions:
+            del index[key]
+
+    def history_pop_expired(self):
+        """
+        get actions, which expiration time is reached
+        """
+        result = []
+        t = time.time()
+        with self.actions_lock:
+            h = self.actions_expiration
+            while h and h[0][0] <= t:
+                u = heapq.heappop(h)[2]
+                try:
+                    result.append(self.actions_by_id[u])
+                except KeyError:
+                    pass
+        return result
+
+    def history_schedule_expiration(self, action, expires):
+        with self.actions_lock:
+            heapq.heappush(
+                self.actions_expiration,
+                (expires, next(self._expiration_seq), action.uuid))
+
     def start(self):
         if self.keep_history is None:
             self.keep_history = eva.core.config.keep_action_history
@@ -162,37 +217,26 @@ async def action_processor(action, **kwargs):
 
 async def action_cleaner(**kwargs):
     o = kwargs.get('o')
-    if not o.actions_lock.acquire(timeout=eva.core.config.timeout):
-        logging.critical('ActiveItemQueue::_t_action_cleanup locking broken')
-        eva.core.critical()
-        return
     logging.debug('cleaning old actions')
-    try:
-        _actions = o.actions.copy()
-    except:
-        _actions = []
-        eva.core.log_traceback()
-    finally:
-        o.actions_lock.release()
-    for a in _actions:
+    for a in o.history_pop_expired():
         try:
-            tk = list(a.time.keys()).copy()
+            maxtime = max(a.time.copy().values())
         except:
             eva.core.log_traceback()
-        maxtime = 0
-        for t in tk:
-            try:
-                maxtime = max(maxtime, a.time[t])
-            except:
-                pass
-        if maxtime and maxtime < time.time() - o.keep_history:
-            if a.is_finished():
-                logging.debug(
-                        '%s action %s too old, removing' % \
-                        (o.q_id, a.uuid))
-                o.history_remove(a)
-            else:
-                logging.warning(
-                    '%s action %s too old, status is %s ' % \
-                    (o.q_id, a.uuid,
-                        eva.item.ia_status_names[a.status]))
+            maxtime = 0
+        t = time.time()
+        if maxtime and maxtime >= t - o.keep_history:
+            # action status changed, re-schedule
+            o.history_schedule_expiration(a, maxtime + o.keep_history)
+        elif a.is_finished():
+            logging.debug(
+                    '%s action %s too old, removing' % \
+                    (o.q_id, a.uuid))
+            o.history_remove(a)
+        else:
+            logging.warning(
+                '%s action %s too old, status is %s ' % \
+                (o.q_id, a.uuid,
+                    eva.item.ia_status_names[a.status]))
+            o.history_schedule_expiration(a,
+                                          t + o.action_cleaner_interval)
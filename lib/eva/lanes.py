@@ -0,0 +1,165 @@
+__author__ = "Altertech Group, https://www.altertech.com/"
+__copyright__ = "Copyright (C) 2012-2021 Altertech Group"
+__license__ = "Apache License 2.0"
+__version__ = "3.4.2"
+
+# item processing lanes
+#
+# items don't own background workers. Each active item has an action lane
+# (priority queue, tasks are processed one by one, in order) and each
+# updatable item has an update lane (coalescing trigger). Lane state is
+# protected by one of the shared shard locks, lane tasks are executed in the
+# core thread pool, so a lane occupies a pool thread only while it has work to
+# do.
+
+import threading
+import heapq
+import itertools
+
+import eva.core
+
+SHARDS = 64
+
+_shard_locks = [threading.Lock() for _ in range(SHARDS)]
+_shard_seq = itertools.count()
+
+
+def _get_shard_lock():
+    return _shard_locks[next(_shard_seq) % SHARDS]
+
+
+class ActionLane:
+    """
+    Per-item action lane
+
+    Tasks are processed by fn(task) one by one, lower priority value first,
+    tasks with the same priority are processed in order
+    """
+
+    def __init__(self, fn, name=None):
+        self.fn = fn
+        self.name = name
+        self.lock = _get_shard_lock()
+        self.q = []
+        self.seq = itertools.count()
+        self.running = False
+        self.active = False
+
+    def set_name(self, name):
+        self.name = name
+
+    def is_active(self):
+        return self.active
+
+    def start(self):
+        with self.lock:
+            self.active = True
+            self._schedule()
+
+    def stop(self):
+        with self.lock:
+            self.active = False
+
+    def put(self, task, priority=None):
+        if priority is None:
+            priority = getattr(task, 'priority', 100)
+        with self.lock:
+            heapq.heappush(self.q, (priority, next(self.seq), task))
+            self._schedule()
+
+    def put_threadsafe(self, task, priority=None):
+        self.put(task, priority=priority)
+
+    def get_nowait(self):
+        """
+        get next task from the lane
+
+        Raises:
+            IndexError: if the lane is empty
+        """
+        with self.lock:
+            return heapq.heappop(self.q)[2]
+
+    def empty(self):
+        return not self.q
+
+    def __len__(self):
+        return len(self.q)
+
+    def _schedule(self):
+        # must be called with lane lock acquired
+        if self.active and self.q and not self.running:
+            self.running = True
+            eva.core.spawn(self._run)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if not self.active or not self.q:
+                    self.running = False
+                    return
+                task = heapq.heappop(self.q)[2]
+            try:
+                self.fn(task)
+            except:
+                eva.core.log_traceback()
+
+
+class UpdateLane:
+    """
+    Per-item update lane
+
+    Calls fn() on trigger. Updates never overlap: triggers, received while
+    the update is running, are ignored, unless forced, forced triggers are
+    coalesced into a single update, executed after the current one
+    """
+
+    def __init__(self, fn, name=None):
+        self.fn = fn
+        self.name = name
+        self.lock = _get_shard_lock()
+        self.running = False
+        self.pending = False
+        self.active = False
+
+    def set_name(self, name):
+        self.name = name
+
+    def is_active(self):
+        return self.active
+
+    def start(self):
+        self.active = True
+
+    def stop(self):
+        with self.lock:
+            self.active = False
+            self.pending = False
+
+    def trigger(self, force=False):
+        with self.lock:
+            if not self.active:
+                return False
+            if self.running:
+                if force:
+                    self.pending = True
+                return True
+            self.running = True
+        eva.core.spawn(self._run)
+        return True
+
+    def trigger_threadsafe(self, force=False):
+        return self.trigger(force=force)
+
+    def _run(self):
+        while True:
+            try:
+                self.fn()
+            except:
+                eva.core.log_traceback()
+            with self.lock:
+                if self.pending and self.active:
+                    self.pending = False
+                else:
+                    self.running = False
+                    return
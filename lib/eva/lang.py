@@ -1,28 +1,92 @@
 import gettext
+import hashlib
+import itertools
+import os
+import pickle
+import threading
+
+from collections import OrderedDict
 from pathlib import Path
 
 default_localedir = Path(__file__).absolute().parents[1] / 'locales'
 
+# max number of memoized document conversions
+cache_size = 256
 
-def _find_el(localedir, lang, document_name=None):
-    el = None
-    bases = ['messages']
-    if document_name:
-        parts = document_name.split('/')
-        for n in range(len(parts)):
-            bases.append('/'.join(parts[:n + 1]))
-    for base in reversed(bases):
+# (localedir, lang, document name): tuple of catalog files
+_catalog_files = {}
+# tuple of catalog files: (mtimes, version, translation object)
+_catalogs = {}
+# (document digest, catalog version): converted document
+_converted = OrderedDict()
+
+_versions = itertools.count(1)
+_lock = threading.RLock()
+
+
+def _is_development():
+    import eva.core
+    return eva.core.config.development
+
+
+def _find_catalog_files(localedir, lang, document_name=None):
+    key = (str(localedir), lang, document_name)
+    with _lock:
+        files = _catalog_files.get(key)
+    if files is None or _is_development():
+        bases = ['messages']
+        if document_name:
+            parts = document_name.split('/')
+            for n in range(len(parts)):
+                bases.append('/'.join(parts[:n + 1]))
+        files = ()
+        for base in reversed(bases):
+            found = gettext.find(base,
+                                 localedir=localedir,
+                                 languages=[lang],
+                                 all=True)
+            if found:
+                files = tuple(found)
+                break
+        with _lock:
+            _catalog_files[key] = files
+    return files
+
+
+def _load_catalog(files):
+    try:
+        mtimes = tuple(os.stat(f).st_mtime_ns for f in files)
+    except FileNotFoundError:
+        return None, None
+    with _lock:
         try:
-            el = gettext.translation(base,
-                                     localedir=localedir,
-                                     languages=[lang])
-            import eva.core
-            if eva.core.config.development:
-                clear_cache()
-            break
-        except FileNotFoundError:
+            m, version, el = _catalogs[files]
+            if m == mtimes:
+                return el, version
+        except KeyError:
             pass
-    return el
+        el = None
+        for f in files:
+            with open(f, 'rb') as fp:
+                t = gettext.GNUTranslations(fp)
+            if el is None:
+                el = t
+            else:
+                el.add_fallback(t)
+        version = next(_versions)
+        _catalogs[files] = (mtimes, version, el)
+        return el, version
+
+
+def _get_catalog(localedir, lang, document_name=None):
+    files = _find_catalog_files(localedir, lang, document_name)
+    if not files:
+        return None, None
+    return _load_catalog(files)
+
+
+def _find_el(localedir, lang, document_name=None):
+    return _get_catalog(localedir, lang, document_name)[0]
 
 
 def _convert_str(text, el=None):
@@ -43,6 +107,17 @@ def _convert_str(text, el=None):
     return '\n'.join(lines)
 
 
+def _convert_obj(obj, el):
+    if isinstance(obj, list):
+        return [_convert_obj(v, el) for v in obj]
+    elif isinstance(obj, dict):
+        return {i: _convert_obj(v, el) for i, v in obj.items()}
+    elif isinstance(obj, str):
+        return _convert_str(obj, el=el)
+    else:
+        return obj
+
+
 def convert_text(text, lang, document_name=None, localedir=default_localedir):
     return _convert_str(text, el=_find_el(localedir, lang, document_name))
 
@@ -52,30 +127,45 @@ def convert(obj,
             document_name=None,
             localedir=default_localedir,
             _el=None):
+    """
+    Translate all strings in the object
+
+    Conversion results are cached by document content and translation catalog
+    version, the returned object can be shared between calls and must not be
+    modified
+    """
+    if _el is not None:
+        return _convert_obj(obj, _el)
     if not isinstance(localedir, list):
         localedir = [localedir]
-    if _el is None:
-        for d in localedir:
-            _el = _find_el(d, lang, document_name)
-            if _el:
-                break
-        else:
-            return obj
-    if isinstance(obj, list):
-        result = obj.copy()
-        for i, v in enumerate(result):
-            result[i] = convert(v, lang, localedir=localedir, _el=_el)
-        return result
-    elif isinstance(obj, dict):
-        result = obj.copy()
-        for i, v in result.items():
-            result[i] = convert(v, lang, localedir=localedir, _el=_el)
-        return result
-    elif isinstance(obj, str):
-        return _convert_str(obj, el=_el)
+    for d in localedir:
+        el, version = _get_catalog(d, lang, document_name)
+        if el:
+            break
     else:
         return obj
+    try:
+        key = (hashlib.sha256(pickle.dumps(obj)).digest(), version)
+    except:
+        return _convert_obj(obj, el)
+    with _lock:
+        try:
+            result = _converted[key]
+            _converted.move_to_end(key)
+            return result
+        except KeyError:
+            pass
+    result = _convert_obj(obj, el)
+    with _lock:
+        _converted[key] = result
+        while len(_converted) > cache_size:
+            _converted.popitem(last=False)
+    return result
 
 
 def clear_cache():
+    with _lock:
+        _catalog_files.clear()
+        _catalogs.clear()
+        _converted.clear()
     gettext._translations.clear()
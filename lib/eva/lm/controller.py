@@ -14,6 +14,8 @@ import sqlalchemy as sa
 from sqlalchemy import text as sql
 
 import eva.core
+import eva.pollscheduler
+import eva.runner
 import eva.api
 import eva.apikey
 import eva.item
@@ -1390,6 +1392,8 @@ def stop():
         v.stop()
     for i, v in items_by_full_id.copy().items():
         v.stop_processors()
+    eva.pollscheduler.stop()
+    eva.runner.stop_persistent_workers()
     if uc_pool:
         uc_pool.stop()
     if plc:
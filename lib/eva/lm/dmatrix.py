@@ -7,6 +7,7 @@ import logging
 import uuid
 import eva.item
 import eva.core
+import eva.benchmark
 import time
 import shlex
 import threading
@@ -27,6 +28,7 @@ class DecisionMatrix:
         self.rules_for_items = {}
         self.rules_locker = threading.RLock()
 
+    @eva.benchmark.timed('dm.process')
     def process(self, item, ns=False):
         if not ns and item.prv_status == item.status and \
                 item.prv_value == item.value:
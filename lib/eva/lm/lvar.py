@@ -6,6 +6,7 @@ __version__ = "3.4.2"
 import eva.core
 import eva.item
 import eva.lm.controller
+import eva.pollscheduler
 import logging
 import time
 import threading
@@ -19,6 +20,8 @@ LOGIC_SIMPLE = 1
 class LVar(eva.item.VariableItem):
 
     fields = [
+        'counter_interval',
+        'counter_step',
         'description',
         'expires',
         'logic',
@@ -38,19 +41,155 @@ class LVar(eva.item.VariableItem):
         self.prv_status = 1
         self.update_lock = threading.RLock()
         self.logic = LOGIC_NORMAL
+        # counter mode: value changes, made by increment/decrement, are
+        # accumulated in memory and published every counter_interval seconds
+        # or when the value crosses a multiple of counter_step
+        self.counter_interval = 0
+        self.counter_step = 0
+        self.counter_rate = 0.0
+        self.counter_scheduler = None
+        self.counter_scheduler_lock = threading.Lock()
+        self._counter = None
+        self._counter_dirty = False
+        self._counter_flushing = False
+        self._counter_published = (None, None)
+        # bumped on counter reset, pending publish is dropped if changed
+        self._counter_gen = 0
+        self._counter_lock = threading.Lock()
         if create:
             self.set_defaults(self.fields)
 
     def update_config(self, data):
         if 'logic' in data:
             self.logic = data['logic']
+        if 'counter_interval' in data:
+            self.counter_interval = data['counter_interval']
+        if 'counter_step' in data:
+            self.counter_step = data['counter_step']
         super().update_config(data)
 
     def increment(self):
-        return self._increment_decrement(op=1)
+        return self.add(1)
 
     def decrement(self):
-        return self._increment_decrement(op=-1)
+        return self.add(-1)
+
+    def add(self, delta):
+        """
+        add delta to lvar value
+
+        In counter mode the value is changed in memory only and published
+        later
+        """
+        if not self.counter_interval:
+            return self._increment_decrement(op=delta)
+        if self._destroyed or \
+                (not self.status and self.logic != LOGIC_SIMPLE):
+            return False
+        with self._counter_lock:
+            if self._counter is None:
+                if self.value != '':
+                    try:
+                        self._counter = int(self.value)
+                    except:
+                        return False
+                else:
+                    self._counter = 0
+            prev = self._counter
+            self._counter += delta
+            self._counter_dirty = True
+            step = self.counter_step
+            if step and prev // step != self._counter // step and \
+                    not self._counter_flushing:
+                self._counter_flushing = True
+                flush = True
+            else:
+                flush = False
+        # keep the baseline behaviour: each change postpones expiration
+        if self.expires:
+            self.update_expiration()
+        if flush:
+            eva.core.spawn(self.flush_counter)
+        return True
+
+    def flush_counter(self):
+        """
+        publish accumulated counter value and rate
+        """
+        if not self.update_lock.acquire(timeout=eva.core.config.timeout):
+            logging.critical('LVar::flush_counter locking broken')
+            eva.core.critical()
+            self._counter_flushing = False
+            return
+        try:
+            with self._counter_lock:
+                dirty = self._counter_dirty
+                v = self._counter
+                gen = self._counter_gen
+                self._counter_dirty = False
+            now = time.perf_counter()
+            pv, pt = self._counter_published
+            if v is not None and pv is not None and now > pt:
+                rate = round((v - pv) / (now - pt), 3)
+            else:
+                rate = 0.0
+            if v is not None:
+                self._counter_published = (v, now)
+            rate_changed = rate != self.counter_rate
+            self.counter_rate = rate
+            if dirty:
+                with self._counter_lock:
+                    if gen != self._counter_gen:
+                        # the value has been set explicitly
+                        return
+                self.update_set_state(value=v,
+                                      force_notify=rate_changed,
+                                      _counter=True)
+            elif rate_changed:
+                self.notify()
+        except:
+            eva.core.log_traceback()
+        finally:
+            self.update_lock.release()
+            self._counter_flushing = False
+
+    def _poll_counter(self):
+        if (self._counter_dirty or self.counter_rate) and \
+                not self._counter_flushing:
+            self._counter_flushing = True
+            eva.core.spawn(self.flush_counter)
+
+    def _reset_counter(self):
+        with self._counter_lock:
+            self._counter = None
+            self._counter_dirty = False
+            self._counter_published = (None, None)
+            self._counter_gen += 1
+
+    def start_counter_scheduler(self):
+        with self.counter_scheduler_lock:
+            if self.counter_interval:
+                if self.counter_scheduler:
+                    eva.pollscheduler.unregister(self.counter_scheduler)
+                self.counter_scheduler = eva.pollscheduler.register(
+                    f'{self.oid}:counter', self.counter_interval,
+                    self._poll_counter)
+
+    def stop_counter_scheduler(self):
+        with self.counter_scheduler_lock:
+            if self.counter_scheduler:
+                eva.pollscheduler.unregister(self.counter_scheduler)
+                self.counter_scheduler = None
+
+    def start_processors(self):
+        self.start_counter_scheduler()
+        super().start_processors()
+
+    def stop_processors(self):
+        self.stop_counter_scheduler()
+        if self._counter_dirty:
+            self.flush_counter()
+        super().stop_processors()
 
     def _increment_decrement(self, op=1):
         if not self.update_lock.acquire(timeout=eva.core.config.timeout):
@@ -93,7 +232,8 @@ class LVar(eva.item.VariableItem):
                          from_mqtt=False,
                          force_notify=False,
                          notify=True,
-                         timestamp=None):
+                         timestamp=None,
+                         _counter=False):
         if not self.status and status != 1 and self.logic != LOGIC_SIMPLE:
             return False
         if not self.update_lock.acquire(timeout=eva.core.config.timeout):
@@ -113,6 +253,9 @@ class LVar(eva.item.VariableItem):
                                         timestamp=timestamp):
                 self.prv_status = _status
                 self.prv_value = _value
+                if value is not None and not _counter and \
+                        self.counter_interval:
+                    self._reset_counter()
                 eva.lm.controller.pdme(self)
                 return True
             return False
@@ -134,6 +277,44 @@ class LVar(eva.item.VariableItem):
                 self.log_set(prop, logic)
                 self.set_modified(save)
             return True
+        elif prop == 'counter_interval':
+            if val is None:
+                counter_interval = 0
+            else:
+                try:
+                    counter_interval = float(val)
+                except:
+                    return False
+            if counter_interval < 0:
+                return False
+            if self.counter_interval != counter_interval:
+                self.counter_interval = counter_interval
+                self.log_set(prop, counter_interval)
+                self.set_modified(save)
+                if not counter_interval:
+                    self.stop_counter_scheduler()
+                    if self._counter_dirty:
+                        self.flush_counter()
+                    self._reset_counter()
+                    self.counter_rate = 0.0
+                else:
+                    self.start_counter_scheduler()
+            return True
+        elif prop == 'counter_step':
+            if val is None:
+                counter_step = 0
+            else:
+                try:
+                    counter_step = int(val)
+                except:
+                    return False
+            if counter_step < 0:
+                return False
+            if self.counter_step != counter_step:
+                self.counter_step = counter_step
+                self.log_set(prop, counter_step)
+                self.set_modified(save)
+            return True
         elif super().set_prop(prop=prop, val=val, save=save):
             if prop == 'expires':
                 self.ieid = eva.core.generate_ieid()
@@ -152,6 +333,9 @@ class LVar(eva.item.VariableItem):
                     (self.oid, self.value))
 
     def set_expired(self):
+        if self.counter_interval:
+            with self.update_lock:
+                self._reset_counter()
         if self.logic == LOGIC_SIMPLE:
             super().update_set_state(value='',
                                      force_update=self.logic == LOGIC_SIMPLE,
@@ -174,11 +358,19 @@ class LVar(eva.item.VariableItem):
                               notify=notify)
         if props:
             d['logic'] = 'simple' if self.logic == LOGIC_SIMPLE else 'normal'
+            d['counter_interval'] = self.counter_interval
+            d['counter_step'] = self.counter_step
         elif config:
             d['logic'] = self.logic
+            if self.counter_interval:
+                d['counter_interval'] = self.counter_interval
+            if self.counter_step:
+                d['counter_step'] = self.counter_step
         d['expires'] = self.expires
         if not config and not props:
             d['set_time'] = self.set_time
+            if self.counter_interval and not info:
+                d['rate'] = self.counter_rate
         return d
 
     def destroy(self):
@@ -4,6 +4,7 @@ __license__ = "Apache License 2.0"
 __version__ = "3.4.2"
 
 import eva.core
+import eva.benchmark
 import eva.item
 import eva.lm.controller
 import eva.lm.macro_api
@@ -255,7 +256,6 @@ class PLC(eva.item.ActiveItem):
 
     def __init__(self):
         super().__init__(eva.core.config.system_name, 'plc')
-        self.action_processor._suppress_sleep = True
         self.update_config({
             'group': 'lm',
             'action_enabled': True,
@@ -263,7 +263,7 @@ class PLC(eva.item.ActiveItem):
             'action_allow_termination': False,
         })
 
-    async def _run_action_processor(self, a, **kwargs):
+    def _run_action_processor(self, a, **kwargs):
         if a.item:
             if not self.queue_lock.acquire(timeout=eva.core.config.timeout):
                 logging.critical('PLC::_t_action_processor locking broken')
@@ -299,6 +299,7 @@ class PLC(eva.item.ActiveItem):
                 self.action_xc = None
                 self.queue_lock.release()
 
+    @eva.benchmark.timed('plc.action')
     def _t_action(self, a):
         try:
             import eva.runner
@@ -8,6 +8,10 @@ import eva.core
 import time
 import sys
 import os
+import re
+import heapq
+import datetime
+import threading
 
 import pyaltt2.logs
 
@@ -17,8 +21,14 @@ from eva.tools import SimpleNamespace
 
 from functools import partial
 
+from collections import deque
+
+from neotasker import background_worker
+
 KEEP_EXCEPTIONS = 100
 
+NOTIFY_BUFFER_SIZE = 10000
+
 log_levels_by_name = {
     'debug': 10,
     'info': 20,
@@ -48,10 +58,188 @@ def get_log_level_by_id(l):
     return level
 
 
+# in-memory log ring
+#
+# records are stored in a fixed-size ring, each slot keeps (seq, record). Per
+# level and per module indexes keep record seqs, so log_get walks only the
+# records, matching the filter, from the newest ones. Overwritten slots are
+# detected by seq mismatch. Log notifications are collected and sent to
+# notifiers in batches by log_notifier worker.
+
+_ring = SimpleNamespace(size=0,
+                        records=[],
+                        seq=0,
+                        by_level={},
+                        by_mod={},
+                        lock=threading.Lock())
+
+_notify = SimpleNamespace(pending={},
+                          pending_count=0,
+                          dropped=0,
+                          lock=threading.Lock())
+
+
+def _init_ring(size):
+    with _ring.lock:
+        if size != _ring.size:
+            _ring.size = size
+            _ring.records = [None] * size
+            _ring.seq = 0
+            _ring.by_level.clear()
+            _ring.by_mod.clear()
+
+
+def _ring_put(r):
+    with _ring.lock:
+        if not _ring.size:
+            return
+        seq = _ring.seq
+        _ring.seq += 1
+        _ring.records[seq % _ring.size] = (seq, r)
+        floor = seq - _ring.size
+        for idx in (_ring.by_level.setdefault(r['l'], deque()),
+                    _ring.by_mod.setdefault(r.get('mod'), deque())):
+            idx.append(seq)
+            while idx[0] <= floor:
+                idx.popleft()
+
+
+def append(record=None, rd=None, **kwargs):
+    """
+    append log record to memory ring and notify
+
+    Replaces pyaltt2.logs.append, args are the same
+    """
+    if record:
+        r = {
+            't': record.created,
+            'msg': record.getMessage(),
+            'l': record.levelno,
+            'th': record.threadName,
+            'mod': record.module,
+            'h': pyaltt2.logs.config.host,
+            'p': pyaltt2.logs.config.name
+        }
+    elif rd:
+        r = rd
+    else:
+        return
+    cfg = pyaltt2.logs.config
+    if r['msg'] and (r['l'] >= cfg.omit_ignore_for_level or
+                     (not cfg.ignore or r['msg'][0] != cfg.ignore) and
+                     r.get('mod') not in cfg.ignore_mods):
+        if pyaltt2.logs.LOCAL_TZ:
+            r['dt'] = datetime.datetime.fromtimestamp(r['t']).replace(
+                tzinfo=pyaltt2.logs.LOCAL_TZ).isoformat()
+        r['lvl'] = get_log_level_by_id(r['l'])
+        if eva.core.config.keep_logmem:
+            _ring_put(r)
+        handle_append(r, **kwargs)
+
+
+def get(level=0, t=0, n=None, pattern=None, module=None):
+    """
+    get recent log records
+
+    Args:
+        level: minimal log level
+        t: get entries for the recent t seconds
+        n: max number of log records (default: 100)
+        pattern: regex pattern filter
+        module: get records for the specified module only
+    """
+    if n is None:
+        n = pyaltt2.logs.DEFAULT_LOG_GET
+    if n > pyaltt2.logs.MAX_LOG_GET:
+        n = pyaltt2.logs.MAX_LOG_GET
+    if level is None:
+        level = 0
+    now = time.time()
+    t_min = now - t if t else 0
+    if eva.core.config.keep_logmem:
+        t_min = max(t_min, now - eva.core.config.keep_logmem)
+    rgx = re.compile(pattern, re.IGNORECASE) if pattern else None
+    with _ring.lock:
+        if module is not None:
+            idxs = [list(_ring.by_mod.get(module, ()))]
+        else:
+            idxs = [list(v) for l, v in _ring.by_level.items() if l >= level]
+    if len(idxs) == 1:
+        seqs = reversed(idxs[0])
+    else:
+        seqs = heapq.merge(*(reversed(i) for i in idxs), reverse=True)
+    records = _ring.records
+    size = _ring.size
+    lr = []
+    for seq in seqs:
+        try:
+            s, r = records[seq % size]
+        except (TypeError, ZeroDivisionError):
+            break
+        if s != seq:
+            # overwritten, all older ones are as well
+            break
+        if r['t'] <= t_min:
+            # appended records keep their own time, so the order by time is
+            # not guaranteed
+            continue
+        if r['l'] >= level and (rgx is None or rgx.search(r['msg'])):
+            lr.append(r)
+            if len(lr) >= n:
+                break
+    return list(reversed(lr))
+
+
+def get_stats():
+    with _ring.lock:
+        return {
+            'ring_size': _ring.size,
+            'records': min(_ring.seq, _ring.size),
+            'notify_pending': _notify.pending_count,
+            'notify_dropped': _notify.dropped
+        }
+
+
+@eva.core.dump
+@eva.core.minidump
+def dump():
+    return {'log_ring': get_stats()}
+
+
 def handle_append(rd, **kwargs):
     import eva.notify
-    rd['lvl'] = get_log_level_by_id(rd['l'])
-    eva.notify.notify('log', [rd], **kwargs)
+    if not eva.core.config.log_notify_interval:
+        eva.notify.notify('log', [rd], **kwargs)
+        return
+    key = tuple(sorted(kwargs.items())) if kwargs else ()
+    with _notify.lock:
+        if _notify.pending_count >= NOTIFY_BUFFER_SIZE:
+            _notify.dropped += 1
+        else:
+            _notify.pending.setdefault(key, []).append(rd)
+            _notify.pending_count += 1
+
+
+def notify_flush():
+    """
+    send collected log records to notifiers
+    """
+    with _notify.lock:
+        if not _notify.pending_count:
+            return
+        pending = _notify.pending
+        _notify.pending = {}
+        _notify.pending_count = 0
+    import eva.notify
+    for key, records in pending.items():
+        eva.notify.notify('log', records, **dict(key))
+
+
+@background_worker(delay=0.1,
+                   name='logs:log_notifier',
+                   on_error=eva.core.log_traceback)
+def log_notifier(**kwargs):
+    notify_flush()
 
 
 def init():
@@ -67,6 +255,9 @@ def init():
                 '  %(levelname)s ' + eva.core.product.code + \
                 ' %(threadName)s: %(message)s')
     formatter = logging.Formatter(log_format)
+    _init_ring(eva.core.config.keep_logmem_records)
+    pyaltt2.logs.append = append
+    pyaltt2.logs.get = get
     pyaltt2.logs.handle_append = handle_append
     pyaltt2.logs.init(
         name=eva.core.product.code,
@@ -94,9 +285,13 @@ def init():
 
 
 def start():
-    pyaltt2.logs.start(loop='cleaners')
+    if eva.core.config.log_notify_interval:
+        log_notifier.start(_interval=eva.core.config.log_notify_interval)
 
 
 @eva.core.stop
 def stop():
+    if eva.core.config.log_notify_interval:
+        log_notifier.stop()
+        notify_flush()
     pyaltt2.logs.stop()
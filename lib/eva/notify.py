@@ -23,11 +23,10 @@ import sqlalchemy as sa
 from stat import ST_DEV, ST_INO
 
 import eva.registry
+import eva.benchmark
 
 import pyaltt2.logs
 
-from pyaltt2.converters import mq_topic_match
-
 from sqlalchemy import text as sql
 
 import yaml
@@ -44,6 +43,7 @@ from neotasker import g
 from eva.tools import format_json
 from eva.tools import val_to_boolean
 from eva.tools import SimpleNamespace
+from eva.tools import MQTopicTrie
 
 from eva.types import CT_JSON, CT_MSGPACK
 
@@ -221,10 +221,16 @@ class GenericNotifier(object):
 
         def run(self, event, o, **kwargs):
             o._count()
-            o.send_notification(subject=event[0],
-                                data=event[1],
-                                retain=event[2],
-                                unpicklable=event[3])
+            t = time.perf_counter()
+            try:
+                o.send_notification(subject=event[0],
+                                    data=event[1],
+                                    retain=event[2],
+                                    unpicklable=event[3])
+            finally:
+                eva.benchmark.observe('notifier.send_notification',
+                                      time.perf_counter() - t,
+                                      label=o.notifier_id)
 
     class BufSenderWorker(BackgroundIntervalWorker):
 
@@ -240,7 +246,13 @@ class GenericNotifier(object):
                         buf = o.buf[c]
                         o.buf[c] = []
                     o._count()
-                    o.send_notification(subject=c, data=buf)
+                    t = time.perf_counter()
+                    try:
+                        o.send_notification(subject=c, data=buf)
+                    finally:
+                        eva.benchmark.observe('notifier.send_notification',
+                                              time.perf_counter() - t,
+                                              label=o.notifier_id)
 
     class ScheduledNotifyWorker(BackgroundIntervalWorker):
 
@@ -2297,14 +2309,33 @@ class InfluxDB_Notifier(GenericHTTPNotifier):
 
 class PrometheusNotifier(GenericNotifier):
 
-    def __init__(self, notifier_id, space=None, username=None, password=None):
+    # full cache rebuild interval (catches items which don't send state
+    # events, e.g. with notify_events=0, or with changed descriptions)
+    cache_rebuild_interval = 60
+
+    ct_text = 'text/plain; version=0.0.4; charset=utf-8'
+    ct_openmetrics = 'application/openmetrics-text; version=1.0.0; ' + \
+            'charset=utf-8'
+
+    def __init__(self,
+                 notifier_id,
+                 space=None,
+                 username=None,
+                 password=None,
+                 latency_metrics=False,
+                 gzip=False):
         notifier_type = 'prometheus'
         super().__init__(notifier_id=notifier_id,
                          notifier_type=notifier_type,
                          space=space)
         self.username = username
         self.password = password
+        self.latency_metrics = latency_metrics
+        self.gzip = gzip
         self._mounted = False
+        self.cache_lock = threading.RLock()
+        self._openmetrics_used = False
+        self.invalidate_cache()
 
     class Metrics():
 
@@ -2327,12 +2358,85 @@ class PrometheusNotifier(GenericNotifier):
                 except:
                     import eva.api
                     raise eva.api.cp_forbidden_key('invalid username/password')
-            result = []
-            cherrypy.serving.response.headers[
-                'Content-Type'] = 'text/plain; charset=utf-8'
-            e = self.n.is_subscribed('state')
-            if not e:
-                return '\n'
+            headers = cherrypy.serving.request.headers
+            openmetrics = 'application/openmetrics-text' in headers.get(
+                'Accept', '')
+            use_gzip = self.n.gzip and 'gzip' in headers.get(
+                'Accept-Encoding', '')
+            body = self.n.get_body(openmetrics=openmetrics, use_gzip=use_gzip)
+            response_headers = cherrypy.serving.response.headers
+            response_headers['Content-Type'] = self.n.ct_openmetrics \
+                    if openmetrics else self.n.ct_text
+            if use_gzip:
+                response_headers['Content-Encoding'] = 'gzip'
+                response_headers['Vary'] = 'Accept-Encoding'
+            return body
+
+        default.exposed = True
+
+    @staticmethod
+    def _format_item(oid, descr, status, value, set_time, openmetrics):
+        result = []
+        oid = oid.replace('/', ':')
+        ts = f' {set_time}' if openmetrics and set_time else ''
+        if status is not None:
+            try:
+                val = int(status)
+                if descr:
+                    result.append('# HELP {}:status {} status'.format(
+                        oid, descr))
+                result.append('{}:status {}{}'.format(oid, val, ts))
+            except:
+                pass
+        if value is not False:
+            try:
+                if value is None or value == '':
+                    val = 'NaN'
+                else:
+                    val = float(value)
+                if descr:
+                    result.append('# HELP {}:value {} value'.format(
+                        oid, descr))
+                result.append('{}:value {}{}'.format(oid, val, ts))
+            except:
+                pass
+        return '\n'.join(result)
+
+    def _render_item(self, item, d):
+        """
+        pre-render item metrics
+
+        Args:
+            item: item object
+            d: item state (serialized)
+
+        Returns:
+            tuple (plain text, OpenMetrics text or None)
+        """
+        oid = d.get('oid')
+        if not oid:
+            return None
+        descr = getattr(item, 'description', None)
+        status = d.get('status')
+        value = d.get('value', False)
+        set_time = d.get('set_time')
+        plain = self._format_item(oid, descr, status, value, set_time, False)
+        om = self._format_item(oid, descr, status, value, set_time,
+                               True) if self._openmetrics_used else None
+        return (plain, om)
+
+    def invalidate_cache(self):
+        with self.cache_lock:
+            self._items = None
+            self._body = {}
+            self._cache_built = 0
+
+    def _invalidate_body(self):
+        self._body.clear()
+
+    def _rebuild_cache(self, e):
+        items = {}
+        if e:
             import eva.core
             for c in eva.core.controllers:
                 for i, v in c._get_all_items().items():
@@ -2340,40 +2444,107 @@ class PrometheusNotifier(GenericNotifier):
                                     or v.item_type in e.item_types) \
                                     and eva.item.item_match(v, e.item_ids,
                                             e.groups):
-                        d = v.serialize(full=True)
-                        oid = d.get('oid')
-                        descr = d.get('description')
-                        if oid:
-                            oid = oid.replace('/', ':')
-                            if 'status' in d:
-                                try:
-                                    val = int(d['status'])
-                                    if descr:
-                                        result.append(
-                                            '# HELP {}:status {} status'.format(
-                                                oid, descr))
-                                    result.append('{}:status {}'.format(
-                                        oid, val))
-                                except:
-                                    pass
-                            if 'value' in d:
-                                try:
-                                    val = d['value']
-                                    if val is None or val == '':
-                                        val = 'NaN'
-                                    else:
-                                        val = float(val)
-                                    if descr:
-                                        result.append(
-                                            '# HELP {}:value {} value'.format(
-                                                oid, descr))
-                                    result.append('{}:value {}'.format(
-                                        oid, val))
-                                except:
-                                    pass
-            return '\n'.join(result) + '\n'
+                        r = self._render_item(v, v.serialize(full=True))
+                        if r:
+                            items[v.oid] = r
+        self._items = items
+        self._body.clear()
+        self._cache_built = time.perf_counter()
 
-        default.exposed = True
+    @staticmethod
+    def _finalize_body(text, openmetrics, use_gzip):
+        if openmetrics:
+            text += '# EOF\n'
+        body = text.encode()
+        if use_gzip:
+            import gzip
+            body = gzip.compress(body)
+        return body
+
+    def get_body(self, openmetrics=False, use_gzip=False):
+        idx = 1 if openmetrics else 0
+        with self.cache_lock:
+            if openmetrics and not self._openmetrics_used:
+                self._openmetrics_used = True
+                self._items = None
+            if self._items is None or \
+                    self._cache_built + self.cache_rebuild_interval < \
+                    time.perf_counter():
+                self._rebuild_cache(self.is_subscribed('state'))
+            if not self.latency_metrics:
+                try:
+                    return self._body[(idx, use_gzip)]
+                except KeyError:
+                    pass
+            try:
+                text = self._body[idx]
+            except KeyError:
+                text = '\n'.join(
+                    v[idx] for v in self._items.values() if v[idx])
+                if text:
+                    text += '\n'
+                self._body[idx] = text
+            if not self.latency_metrics:
+                body = self._finalize_body(text, openmetrics, use_gzip)
+                self._body[(idx, use_gzip)] = body
+                return body
+        # latency metrics are not cached
+        lines = eva.benchmark.format_histograms_prometheus()
+        if lines:
+            text += '\n'.join(lines) + '\n'
+        return self._finalize_body(text, openmetrics, use_gzip)
+
+    def notify(self, subject, data, unpicklable=False, retain=False):
+        if subject != 'state' or not self.enabled:
+            return False
+        with self.cache_lock:
+            if self._items is None:
+                # not built yet, will be built on the next scrape
+                return False
+            e = self.is_subscribed('state')
+            if not e:
+                return False
+            for item, d in data if isinstance(data, list) else [data]:
+                if d.get('destroyed'):
+                    if self._items.pop(item.oid, None) is not None:
+                        self._invalidate_body()
+                elif e.item_types and ('#' in e.item_types
+                                or item.item_type in e.item_types) \
+                                and eva.item.item_match(item, e.item_ids,
+                                        e.groups):
+                    r = self._render_item(item, d)
+                    if r and self._items.get(item.oid) != r:
+                        self._items[item.oid] = r
+                        self._invalidate_body()
+        return True
+
+    def subscribe(self, *args, **kwargs):
+        try:
+            return super().subscribe(*args, **kwargs)
+        finally:
+            self.invalidate_cache()
+
+    def unsubscribe(self, *args, **kwargs):
+        try:
+            return super().unsubscribe(*args, **kwargs)
+        finally:
+            self.invalidate_cache()
+
+    def subscribe_item(self, *args, **kwargs):
+        super().subscribe_item(*args, **kwargs)
+        self.invalidate_cache()
+
+    def subscribe_group(self, *args, **kwargs):
+        super().subscribe_group(*args, **kwargs)
+        self.invalidate_cache()
+
+    def unsubscribe_item(self, *args, **kwargs):
+        super().unsubscribe_item(*args, **kwargs)
+        self.invalidate_cache()
+
+    def unsubscribe_group(self, *args, **kwargs):
+        super().unsubscribe_group(*args, **kwargs)
+        self.invalidate_cache()
 
     def set_prop(self, prop, value):
         if prop == 'username':
@@ -2382,6 +2553,16 @@ class PrometheusNotifier(GenericNotifier):
         elif prop == 'password':
             self.password = value
             return True
+        elif prop in ['latency_metrics', 'gzip']:
+            if value is None:
+                val = False
+            else:
+                val = val_to_boolean(value)
+                if val is None:
+                    return False
+            setattr(self, prop, val)
+            self.invalidate_cache()
+            return True
         elif prop == 'interval':
             return False
         return super().set_prop(prop, value)
@@ -2392,6 +2573,8 @@ class PrometheusNotifier(GenericNotifier):
             del d['timeout']
         d['username'] = self.username
         d['password'] = self.password
+        d['latency_metrics'] = self.latency_metrics
+        d['gzip'] = self.gzip
         try:
             del d['interval']
         except:
@@ -2399,7 +2582,7 @@ class PrometheusNotifier(GenericNotifier):
         return d
 
     def can_notify(self):
-        return False
+        return self.enabled
 
     def start(self):
         if self.test_only_mode or self._mounted or not self.enabled:
@@ -2409,7 +2592,7 @@ class PrometheusNotifier(GenericNotifier):
                             '/ns/{}/metrics'.format(self.notifier_id))
 
     def stop(self):
-        pass
+        self.invalidate_cache()
 
     def test(self):
         return True
@@ -2539,6 +2722,7 @@ class GenericPubSubNotifier(GenericNotifier):
         self.items_to_control_by_topic = {}
         self.custom_handlers = {}
         self.custom_handlers_qos = {}
+        self.custom_handlers_trie = MQTopicTrie()
         if (username is not None and password is not None):
             self.mq.username_pw_set(username, password)
         if not qos:
@@ -2755,6 +2939,7 @@ class GenericPubSubNotifier(GenericNotifier):
                 if not self.custom_handlers.get(_topic):
                     self.custom_handlers[_topic] = set()
                     self.custom_handlers_qos[_topic] = qos
+                    self.custom_handlers_trie.add(_topic, _topic)
                     self.mq.subscribe(_topic, qos=qos)
                     logging.debug('.%s subscribed to %s for handler' %
                                   (self.notifier_id, _topic))
@@ -2788,6 +2973,7 @@ class GenericPubSubNotifier(GenericNotifier):
                         del self.custom_handlers[_topic]
                     except:
                         pass
+                    self.custom_handlers_trie.remove(_topic, _topic)
                     try:
                         del self.custom_handlers_qos[_topic]
                     except:
@@ -2936,10 +3122,8 @@ class GenericPubSubNotifier(GenericNotifier):
                     eva.core.critical()
                     return False
                 try:
-                    for ct in self.custom_handlers:
-                        if mq_topic_match(t, ct):
-                            for h in self.custom_handlers.get(ct, []):
-                                hte.add(h)
+                    for ct in self.custom_handlers_trie.match(t):
+                        hte.update(self.custom_handlers.get(ct, ()))
                 finally:
                     self.handler_lock.release()
                 for h in hte:
@@ -4549,9 +4733,13 @@ def load_notifier(notifier_id, ncfg=None, test=True, connect=True):
         space = ncfg.get('space')
         username = ncfg.get('username')
         password = ncfg.get('password')
+        latency_metrics = ncfg.get('latency_metrics', False)
+        gzip = ncfg.get('gzip', False)
         n = PrometheusNotifier(notifier_id,
                                username=username,
-                               password=password)
+                               password=password,
+                               latency_metrics=latency_metrics,
+                               gzip=gzip)
     else:
         logging.error('Invalid notifier type = %s' % ncfg['type'])
         return None
@@ -4683,10 +4871,12 @@ def notify(subject,
         except:
             eva.core.log_traceback(notifier=True)
     else:
+        t = time.perf_counter()
         if subject == 'state':
-            eva.core.exec_corescripts(event=SimpleNamespace(
-                type=eva.core.CS_EVENT_STATE, source=data[0], data=data[1]))
-            eva.core.plugins_event_state(source=data[0], data=data[1])
+            for item, d in data if isinstance(data, list) else [data]:
+                eva.core.exec_corescripts(event=SimpleNamespace(
+                    type=eva.core.CS_EVENT_STATE, source=item, data=d))
+                eva.core.plugins_event_state(source=item, data=d)
         for i in list(notifiers):
             try:
                 if notifiers[i].can_notify():
@@ -4698,6 +4888,7 @@ def notify(subject,
                            skip_mqtt=skip_mqtt)
             except KeyError:
                 pass
+        eva.benchmark.observe('notify', time.perf_counter() - t, label=subject)
 
 
 def get_notifier(notifier_id=None, get_default=True):
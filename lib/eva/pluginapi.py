@@ -4,7 +4,7 @@ __license__ = "Apache License 2.0"
 __version__ = "3.4.2"
 __api__ = 3
 
-import threading
+import time
 
 import eva.core
 from eva.apikey import key_id as key_id
@@ -66,7 +66,9 @@ from neotasker import g
 
 get_cmod = partial(get_caller_module, sdir='plugins')
 
-g_lock = threading.RLock()
+# thread-local plugin DB connections, idle longer (seconds), are checked out
+# again, so the pool pre-ping detects connections, lost meanwhile
+plugin_db_idle_check = 1
 
 # general functions
 
@@ -299,26 +301,35 @@ def get_plugin_db(db, mod=None):
     """
     Get plugin custom database SQLAlchemy connection
 
-    The connection object is stored as thread-local and re-used if possible
+    The connection object is stored as thread-local and re-used if possible.
+    Invalidated connections, connections, idle longer than
+    plugin_db_idle_check seconds and connections, held longer than the pool
+    recycle interval, are returned to the engine pool and the new one is
+    checked out (engines, created with create_db_engine, check connections
+    with pre-ping on checkout, so lost connections are replaced)
 
     Args:
         db: SQLAlchemy DB engine
     """
     n = (f'x_{mod if mod else get_cmod()}___dbconn')
-    with g_lock:
-        if not g.has(n):
-            g.set(n, db.connect())
-        else:
-            try:
-                dbconn = g.get(n)
-                dbconn.execute('select 1')
-            except:
-                try:
-                    dbconn.close()
-                except:
-                    pass
-                g.set(n, db.connect())
-        return g.get(n)
+    dbconn = g.get(n)
+    now = time.monotonic()
+    if dbconn is not None:
+        if not dbconn.closed and not dbconn.invalidated and \
+                dbconn.engine is db and (dbconn.in_transaction() or (
+                    now - g.get(n + '_u') < plugin_db_idle_check and
+                    now - g.get(n + '_t') < eva.core.config.db_pool_recycle)):
+            g.set(n + '_u', now)
+            return dbconn
+        try:
+            dbconn.close()
+        except:
+            pass
+    dbconn = db.connect()
+    g.set(n, dbconn)
+    g.set(n + '_t', now)
+    g.set(n + '_u', now)
+    return dbconn
 
 
 # register methods and functions
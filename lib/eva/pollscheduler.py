@@ -0,0 +1,192 @@
+__author__ = "Altertech Group, https://www.altertech.com/"
+__copyright__ = "Copyright (C) 2012-2021 Altertech Group"
+__license__ = "Apache License 2.0"
+__version__ = "3.4.2"
+
+# central poll scheduler for updatable items and PHIs
+#
+# all periodic updates are kept in a single deadline heap. deadlines are
+# aligned to a per-key phase, spread over the update interval. entries of the
+# same poll group (e.g. PHI) share the phase and are triggered together.
+# optionally, entries with unchanged state for N cycles are backed off.
+
+import threading
+import heapq
+import logging
+import time
+import zlib
+
+import eva.core
+
+from eva.tools import SimpleNamespace
+
+config = SimpleNamespace(window=0.01, backoff_cycles=0, backoff_max=10)
+
+_d = SimpleNamespace(heap=[],
+                     groups={},
+                     seq=0,
+                     cond=threading.Condition(),
+                     thread=None,
+                     active=False)
+
+
+class PollEntry:
+
+    def __init__(self, key, interval, fn, group=None, state_fn=None):
+        self.key = key
+        self.interval = interval
+        self.cur_interval = interval
+        self.fn = fn
+        self.group = group
+        self.state_fn = state_fn
+        self.phase = zlib.crc32(str(group if group else key).encode()) % \
+                10000 / 10000
+        self.deadline = None
+        self.version = 0
+        self.cancelled = False
+        self.unchanged = 0
+        self.last_state = None
+
+    def next_deadline(self, now, prev=None):
+        interval = self.cur_interval
+        if prev is not None and prev + interval > now:
+            return prev + interval
+        phase = self.phase * self.interval
+        return ((now - phase) // interval + 1) * interval + phase
+
+    def apply_backoff(self):
+        if not config.backoff_cycles or not self.state_fn:
+            return
+        try:
+            state = self.state_fn()
+        except:
+            eva.core.log_traceback()
+            return
+        if state == self.last_state:
+            self.unchanged += 1
+            if self.unchanged >= config.backoff_cycles:
+                self.unchanged = 0
+                self.cur_interval = min(self.cur_interval * 2,
+                                        self.interval * config.backoff_max)
+        else:
+            self.last_state = state
+            self.unchanged = 0
+            self.cur_interval = self.interval
+
+
+def _push(entry):
+    entry.version += 1
+    _d.seq += 1
+    heapq.heappush(_d.heap, (entry.deadline, _d.seq, entry.version, entry))
+
+
+def register(key, interval, fn, group=None, state_fn=None):
+    """
+    register periodic poll
+
+    Args:
+        key: poll key (e.g. item oid)
+        interval: poll interval (seconds)
+        fn: function, called on poll (must not block)
+        group: poll group, entries of the same group are triggered together
+        state_fn: function, returning current state (for adaptive backoff)
+
+    Returns:
+        poll entry object
+    """
+    entry = PollEntry(key, interval, fn, group=group, state_fn=state_fn)
+    with _d.cond:
+        entry.deadline = entry.next_deadline(time.perf_counter())
+        _push(entry)
+        if group is not None:
+            _d.groups.setdefault(group, set()).add(entry)
+        if not _d.active:
+            _d.active = True
+            _d.thread = threading.Thread(target=_t_scheduler,
+                                         name='poll_scheduler',
+                                         daemon=True)
+            _d.thread.start()
+        else:
+            _d.cond.notify()
+    return entry
+
+
+def unregister(entry):
+    """
+    unregister periodic poll
+    """
+    with _d.cond:
+        entry.cancelled = True
+        if entry.group is not None:
+            g = _d.groups.get(entry.group)
+            if g:
+                g.discard(entry)
+                if not g:
+                    del _d.groups[entry.group]
+
+
+def _pop_due(now):
+    due = []
+    heap = _d.heap
+    while heap and heap[0][0] <= now:
+        deadline, seq, version, entry = heapq.heappop(heap)
+        if entry.cancelled or version != entry.version:
+            continue
+        due.append(entry)
+    # pull group members, which fall into the transaction window
+    if config.window and _d.groups:
+        limit = now + config.window
+        for g in set(e.group for e in due if e.group is not None):
+            for entry in _d.groups.get(g, ()):
+                if entry.deadline > now and entry.deadline <= limit:
+                    due.append(entry)
+    return due
+
+
+def _t_scheduler():
+    logging.debug('poll scheduler started')
+    while True:
+        with _d.cond:
+            if not _d.active:
+                break
+            now = time.perf_counter()
+            due = _pop_due(now)
+            for entry in due:
+                entry.apply_backoff()
+                entry.deadline = entry.next_deadline(now, prev=entry.deadline)
+                _push(entry)
+            if not due:
+                timeout = _d.heap[0][0] - now if _d.heap else None
+                _d.cond.wait(timeout=timeout)
+                continue
+        for entry in due:
+            try:
+                entry.fn()
+            except:
+                logging.error(f'poll scheduler: {entry.key} poll error')
+                eva.core.log_traceback()
+    logging.debug('poll scheduler stopped')
+
+
+def stop():
+    with _d.cond:
+        _d.active = False
+        _d.cond.notify()
+
+
+def update_config(cfg):
+    try:
+        config.window = float(cfg.get('server/poll-window'))
+    except LookupError:
+        pass
+    logging.debug(f'server.poll_window = {config.window}')
+    try:
+        config.backoff_cycles = int(cfg.get('server/poll-backoff'))
+    except LookupError:
+        pass
+    logging.debug(f'server.poll_backoff = {config.backoff_cycles}')
+    try:
+        config.backoff_max = float(cfg.get('server/poll-backoff-max'))
+    except LookupError:
+        pass
+    logging.debug(f'server.poll_backoff_max = {config.backoff_max}')
@@ -166,6 +166,19 @@ def key_set(key, value, **kwargs):
     return db.key_set(key=f'{PFX}/{SYSTEM_NAME}/{key}', value=value, **kwargs)
 
 
+@safe
+def key_set_batch(data):
+    """
+    Set multiple keys in a single registry call
+
+    Schema validations are ignored
+
+    Args:
+        data: list of (key, value) tuples
+    """
+    return db.key_load(data=[(f'{PFX}/{SYSTEM_NAME}/{k}', v) for k, v in data])
+
+
 @safe
 def key_set_field(key, field, value, **kwargs):
     """
@@ -11,8 +11,11 @@ import time
 import os
 import traceback
 import uuid
+import queue
+import rapidjson
 
 import eva.core
+import eva.benchmark
 import eva.uc.driverapi
 
 import concurrent.futures
@@ -106,6 +109,7 @@ class DriverCommand(GenericRunner):
 
     def run(self):
         if self.driver:
+            t = time.perf_counter()
             if self.update:
                 self.run_future = eva.core.spawn(self.driver.state, self._uuid,
                                                  self.cfg, self.timeout,
@@ -133,6 +137,10 @@ class DriverCommand(GenericRunner):
                     self.run_future.result()
             except:
                 eva.core.log_traceback()
+            eva.benchmark.observe(
+                'driver.state' if self.update else 'driver.action',
+                time.perf_counter() - t,
+                label=self.driver_id)
         else:
             logging.error('driver %s not found' % self.driver_id)
         self.finish()
@@ -308,6 +316,226 @@ class ExternalProcess(GenericRunner):
         return
 
 
+# persistent external processes
+#
+# if update/action script name starts with "@", the script is started once
+# and kept running. Each update/action is sent to the script stdin as a
+# single-line JSON frame:
+#
+#   {"id": <request id>, "args": [...], "env": {...}, "input": <data|null>}
+#
+# the script must reply to stdout with a single-line JSON frame:
+#
+#   {"id": <request id>, "exitcode": <code>, "out": "...", "err": "..."}
+#
+# if the script crashes or exits, it is restarted on the next request. If the
+# request is timed out or terminated, the script is killed and restarted as
+# well.
+
+persistent_prefix = '@'
+
+_persistent_workers = {}
+_persistent_workers_lock = threading.Lock()
+
+
+class PersistentWorker(object):
+
+    def __init__(self, xc_fname):
+        self.xc_fname = xc_fname
+        self.xc = None
+        self.lock = threading.Lock()
+        self.responses = None
+        self.request_id = 0
+
+    def is_alive(self):
+        return self.xc is not None and self.xc.poll() is None
+
+    def start(self):
+        env = eva.core.env.copy()
+        env['EVA_PERSISTENT'] = '1'
+        self.xc = subprocess.Popen(args=(self.xc_fname,),
+                                   env=env,
+                                   stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        self.responses = queue.Queue()
+        eva.core.spawn_daemon(self._t_collect_stdout, self.xc.stdout,
+                              self.responses)
+        eva.core.spawn_daemon(self._t_collect_stderr, self.xc.stderr)
+        logging.debug(f'persistent process {self.xc_fname} started, '
+                      f'pid: {self.xc.pid}')
+
+    def _t_collect_stdout(self, pipe, q):
+        for line in iter(pipe.readline, b''):
+            q.put(line)
+        # EOF, the process is dead
+        q.put(None)
+
+    def _t_collect_stderr(self, pipe):
+        for line in iter(pipe.readline, b''):
+            logging.debug(f'persistent process {self.xc_fname} stderr: ' +
+                          line.decode(errors='replace').rstrip())
+
+    def kill(self, tki):
+        xc = self.xc
+        if xc is None:
+            return
+        self.xc = None
+        if xc.poll() is not None:
+            return
+        try:
+            pp = psutil.Process(xc.pid)
+            childs = pp.children(recursive=True)
+        except:
+            childs = []
+        for p in [xc] + childs:
+            try:
+                p.terminate()
+            except:
+                pass
+        eva.core.wait_for(lambda: xc.poll() is not None, tki)
+        for p in [xc] + childs:
+            try:
+                p.kill()
+            except:
+                pass
+        logging.debug(f'persistent process {self.xc_fname} killed')
+
+    def call(self, args, env, input_data, timeout, tki, termflag):
+        """
+        send request frame and wait for the response
+
+        Returns:
+            tuple (exitcode, out, err)
+        """
+        t_end = time.perf_counter() + timeout
+        if not self.lock.acquire(timeout=timeout):
+            return -15, None, 'persistent process is busy'
+        try:
+            if not self.is_alive():
+                if self.xc is not None:
+                    logging.warning(f'persistent process {self.xc_fname} '
+                                    f'exited with code {self.xc.returncode}, '
+                                    'restarting')
+                self.start()
+            self.request_id += 1
+            req_id = self.request_id
+            frame = {'id': req_id, 'args': list(args), 'env': env}
+            if input_data is not None:
+                frame['input'] = input_data if not isinstance(
+                    input_data, bytes) else input_data.decode()
+            else:
+                frame['input'] = None
+            try:
+                self.xc.stdin.write(rapidjson.dumps(frame).encode() + b'\n')
+                self.xc.stdin.flush()
+            except:
+                eva.core.log_traceback()
+                self.kill(tki)
+                return -1, None, 'persistent process write error'
+            while True:
+                if termflag.is_set():
+                    self.kill(tki)
+                    return -15, None, 'terminated'
+                # check termination flag every 0.1 sec
+                t = min(t_end - time.perf_counter(), 0.1)
+                if t <= 0:
+                    logging.warning(f'persistent process {self.xc_fname} '
+                                    'request timeout, restarting')
+                    self.kill(tki)
+                    return -15, None, 'timeout'
+                try:
+                    line = self.responses.get(timeout=t)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    xc = self.xc
+                    code = xc.wait() if xc else None
+                    return (code if code else -1, None,
+                            'persistent process exited')
+                try:
+                    resp = rapidjson.loads(line.decode())
+                except:
+                    logging.warning(f'persistent process {self.xc_fname} '
+                                    'invalid response frame, skipping')
+                    continue
+                if resp.get('id') != req_id:
+                    # stale response of the previous request
+                    continue
+                exitcode = resp.get('exitcode', 0)
+                return (exitcode if isinstance(exitcode, int) else -1,
+                        resp.get('out', ''), resp.get('err', ''))
+        finally:
+            self.lock.release()
+
+
+def get_persistent_worker(xc_fname):
+    with _persistent_workers_lock:
+        try:
+            return _persistent_workers[xc_fname]
+        except KeyError:
+            w = PersistentWorker(xc_fname)
+            _persistent_workers[xc_fname] = w
+            return w
+
+
+def stop_persistent_workers():
+    with _persistent_workers_lock:
+        workers = list(_persistent_workers.values())
+        _persistent_workers.clear()
+    for w in workers:
+        w.kill(default_tki_diff)
+
+
+class PersistentProcess(ExternalProcess):
+
+    def __init__(self, fname, *args, **kwargs):
+        super().__init__(fname[len(persistent_prefix):], *args, **kwargs)
+
+    def xc_finished(self):
+        return self.finished.is_set()
+
+    def run(self, input_data=None):
+        try:
+            w = get_persistent_worker(self.xc_fname)
+            # the process already has the core env, send the rest only
+            env = {
+                k: v
+                for k, v in self.env.items()
+                if eva.core.env.get(k) != v
+            }
+            self.exitcode, self.out, self.err = w.call(self.args, env,
+                                                       input_data,
+                                                       self.timeout,
+                                                       self.term_kill_interval,
+                                                       self.termflag)
+        except:
+            logging.error('external process error %s' % self.xc_fname)
+            eva.core.log_traceback()
+            self.exitcode = -1
+        self.finished.set()
+
+    def launch(self, input_data=None):
+        eva.core.spawn(self.run, input_data=input_data)
+        return True
+
+    def finish(self):
+        pass
+
+
+def get_xc(fname, *args, **kwargs):
+    """
+    get external process runner
+
+    If the script name starts with "@", the persistent process runner is
+    returned
+    """
+    if fname and fname.startswith(persistent_prefix):
+        return PersistentProcess(fname, *args, **kwargs)
+    else:
+        return ExternalProcess(fname, *args, **kwargs)
+
+
 code_cache = {}
 code_cache_m = {}
 
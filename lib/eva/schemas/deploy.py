@@ -561,6 +561,14 @@ SCHEMA_DEPLOY = {
                             'type': 'string',
                             'enum': ['simple', 'normal']
                         },
+                        'counter_interval': {
+                            'type': 'number',
+                            'minimum': 0
+                        },
+                        'counter_step': {
+                            'type': 'integer',
+                            'minimum': 0
+                        },
                         'mqtt_update': {
                             'type': ['string', 'null']
                         },
@@ -0,0 +1,236 @@
+__author__ = "Altertech Group, https://www.altertech.com/"
+__copyright__ = "Copyright (C) 2012-2021 Altertech Group"
+__license__ = "Apache License 2.0"
+__version__ = "3.4.2"
+
+# pvt file serving caches
+#
+# resized images are cached in memory and on disk, keyed by file path,
+# mtime, size and resize params, both caches are LRU-bound. Directory
+# listings are cached and refreshed when directory mtime is changed (or
+# after index_ttl, to catch in-place file modifications).
+
+import os
+import glob
+import fnmatch
+import hashlib
+import logging
+import threading
+import time
+
+import eva.core
+
+from collections import OrderedDict
+
+from eva.tools import SimpleNamespace
+
+max_image_size = 10000000
+
+config = SimpleNamespace(mem_size=32 * 1024 * 1024,
+                         disk_size=256 * 1024 * 1024,
+                         disk_dir=eva.core.dir_var + '/pvtcache',
+                         index_ttl=1)
+
+_d = SimpleNamespace(mem=OrderedDict(),
+                     mem_used=0,
+                     disk=None,
+                     disk_used=0,
+                     dirs={},
+                     lock=threading.RLock())
+
+
+def get_cache_key(fname, mtime, size, *args):
+    key = '{}:{}:{}:{}'.format(fname, mtime, size,
+                               ':'.join(str(a) for a in args))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _init_disk_cache():
+    _d.disk = OrderedDict()
+    _d.disk_used = 0
+    try:
+        os.makedirs(config.disk_dir, exist_ok=True)
+        entries = []
+        for e in os.scandir(config.disk_dir):
+            if e.is_file():
+                st = e.stat()
+                entries.append((st.st_mtime, e.name, st.st_size))
+        for t, name, size in sorted(entries):
+            _d.disk[name] = size
+            _d.disk_used += size
+    except:
+        logging.warning(f'unable to init pvt cache dir {config.disk_dir}')
+        eva.core.log_traceback()
+
+
+def _mem_put(key, data):
+    if len(data) > config.mem_size:
+        return
+    old = _d.mem.pop(key, None)
+    if old is not None:
+        _d.mem_used -= len(old)
+    _d.mem[key] = data
+    _d.mem_used += len(data)
+    while _d.mem_used > config.mem_size:
+        k, v = _d.mem.popitem(last=False)
+        _d.mem_used -= len(v)
+
+
+def _disk_put(key, data):
+    if not config.disk_size or len(data) > config.disk_size:
+        return
+    try:
+        fname = f'{config.disk_dir}/{key}'
+        with open(fname + '.tmp', 'wb') as fh:
+            fh.write(data)
+        os.rename(fname + '.tmp', fname)
+    except:
+        logging.warning(f'unable to write pvt cache file {key}')
+        eva.core.log_traceback()
+        return
+    _d.disk_used -= _d.disk.pop(key, 0)
+    _d.disk[key] = len(data)
+    _d.disk_used += len(data)
+    while _d.disk_used > config.disk_size:
+        k, size = _d.disk.popitem(last=False)
+        _d.disk_used -= size
+        try:
+            os.unlink(f'{config.disk_dir}/{k}')
+        except FileNotFoundError:
+            pass
+        except:
+            eva.core.log_traceback()
+
+
+def _disk_get(key):
+    try:
+        _d.disk.move_to_end(key)
+    except KeyError:
+        return None
+    fname = f'{config.disk_dir}/{key}'
+    try:
+        with open(fname, 'rb') as fh:
+            data = fh.read()
+        os.utime(fname)
+        return data
+    except:
+        _d.disk_used -= _d.disk.pop(key, 0)
+        return None
+
+
+def get(key):
+    """
+    get cached data
+
+    Returns:
+        cached data or None if not found
+    """
+    with _d.lock:
+        try:
+            data = _d.mem[key]
+            _d.mem.move_to_end(key)
+            return data
+        except KeyError:
+            pass
+        if _d.disk is None:
+            _init_disk_cache()
+        data = _disk_get(key)
+        if data is not None:
+            _mem_put(key, data)
+        return data
+
+
+def put(key, data):
+    """
+    put data to cache
+    """
+    with _d.lock:
+        if _d.disk is None:
+            _init_disk_cache()
+        _mem_put(key, data)
+        _disk_put(key, data)
+
+
+def resize_image(fname, st, x, y, q, fmt):
+    """
+    resize image, use cached result if possible
+
+    Args:
+        fname: image file
+        st: image file stat
+        x, y: thumbnail size
+        q: quality
+        fmt: output format
+
+    Returns:
+        tuple (cache key, image data)
+    """
+    if st.st_size > max_image_size:
+        raise ValueError(f'image {fname} is too large')
+    key = get_cache_key(fname, st.st_mtime_ns, st.st_size, x, y, q, fmt)
+    result = get(key)
+    if result is None:
+        from PIL import Image
+        image = Image.open(fname)
+        image.thumbnail((x, y))
+        result = image.tobytes(fmt, 'RGB', q)
+        put(key, result)
+    return key, result
+
+
+def _get_dir_index(path):
+    try:
+        dir_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+    now = time.perf_counter()
+    with _d.lock:
+        try:
+            mtime, t, index = _d.dirs[path]
+            if mtime == dir_mtime and now - t < config.index_ttl:
+                return index
+        except KeyError:
+            pass
+    index = {}
+    try:
+        with os.scandir(path) as entries:
+            for e in entries:
+                try:
+                    if e.is_file():
+                        index[e.name] = e.stat()
+                except OSError:
+                    pass
+    except OSError:
+        return {}
+    with _d.lock:
+        _d.dirs[path] = (dir_mtime, now, index)
+    return index
+
+
+def list_files(mask):
+    """
+    list files, matching the mask
+
+    Returns:
+        list of tuples (file name, file stat)
+    """
+    path, fmask = os.path.split(mask)
+    if glob.has_magic(path):
+        result = []
+        for f in glob.glob(mask):
+            try:
+                st = os.stat(f)
+            except FileNotFoundError:
+                continue
+            if os.path.isfile(f):
+                result.append((f, st))
+        return result
+    index = _get_dir_index(path if path else '.')
+    if not glob.has_magic(fmask):
+        st = index.get(fmask)
+        return [(mask, st)] if st else []
+    hidden = fmask.startswith('.')
+    return [(f'{path}/{name}' if path else name, st)
+            for name, st in index.items()
+            if (hidden or not name.startswith('.')) and
+            fnmatch.fnmatch(name, fmask)]
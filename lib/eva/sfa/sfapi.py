@@ -23,6 +23,8 @@ from io import BytesIO
 from functools import wraps
 
 from cherrypy.lib.static import serve_file
+from cherrypy.lib import cptools
+from cherrypy.lib import httputil
 from eva.tools import format_json
 from eva.tools import dict_merge
 
@@ -87,6 +89,7 @@ from eva import apikey
 
 import eva.sfa.controller
 import eva.sfa.cloudmanager
+import eva.sfa.pvtcache
 import eva.sysapi
 
 import eva.registry
@@ -387,20 +390,28 @@ class SFA_API(GenericAPI, GenericCloudAPI):
                 return gi[_i].serialize(full=full)
             else:
                 raise ResourceNotFound
-        result = []
         if isinstance(group, list):
             _group = group
         elif isinstance(group, str):
             _group = str(group).split(',')
         else:
             _group = None
-        for i, v in gi.copy().items():
-            if key_check(k, v, ro_op=True) and \
-                    (not group or \
-                        eva.item.item_match(v, [], _group)):
-                r = v.serialize(full=full)
-                result.append(r)
-        return sorted(result, key=lambda k: k['oid'])
+        if group:
+            # match groups instead of items, the item type is the same
+            items = []
+            for g in gi.groups():
+                group_items = gi.group_items(g)
+                if group_items and eva.item.item_match(group_items[0], [],
+                                                       _group):
+                    items += group_items
+            items.sort(key=lambda v: v.oid)
+        else:
+            items = gi.sorted_items()
+        return [
+            v.serialize(full=full)
+            for v in items
+            if key_check(k, v, ro_op=True)
+        ]
 
     @log_d
     @notify_plugins
@@ -426,11 +437,15 @@ class SFA_API(GenericAPI, GenericCloudAPI):
         else:
             return None
         result = []
-        for i, v in gi.copy().items():
-            if key_check(k, v, ro_op=True) and (not group or \
-                        eva.item.item_match(v, [], [group])) and \
-                        v.group not in result:
-                result.append(v.group)
+        for g in gi.groups():
+            group_items = gi.group_items(g)
+            if not group_items or (group and not eva.item.item_match(
+                    group_items[0], [], [group])):
+                continue
+            for v in group_items:
+                if key_check(k, v, ro_op=True):
+                    result.append(g)
+                    break
         return sorted(result)
 
     @log_i
@@ -1348,8 +1363,7 @@ class SFA_HTTP_API_abstract(SFA_API, GenericHTTP_API):
                 result += self.list_cycles(k=k, g=g)
             except:
                 pass
-        return sorted(sorted(result, key=lambda k: k['oid']),
-                      key=lambda k: k['type'])
+        return sorted(result, key=lambda k: (k['type'], k['oid']))
 
 
 class SFA_HTTP_API(SFA_HTTP_API_abstract, GenericHTTP_API):
@@ -1617,26 +1631,28 @@ def serve_pvt(*args,
         return serve_json_yml(f, dts='pvt')
     _f = eva.core.dir_pvt + '/' + f
     _f_alt = None
+    _st = None
+    _st_alt = None
     if c:
-        fls = [x for x in glob.glob(_f) if os.path.isfile(x)]
+        fls = eva.sfa.pvtcache.list_files(_f)
         if not fls:
             raise cp_api_404()
         if c == 'newest':
-            _f = max(fls, key=os.path.getmtime)
-            fls.remove(_f)
-            if fls:
-                _f_alt = max(fls, key=os.path.getmtime)
+            fls.sort(key=lambda x: x[1].st_mtime)
+            _f, _st = fls[-1]
+            if len(fls) > 1:
+                _f_alt, _st_alt = fls[-2]
         elif c == 'oldest':
-            _f = min(fls, key=os.path.getmtime)
+            _f, _st = min(fls, key=lambda x: x[1].st_mtime)
         elif c == 'list':
             l = []
-            for x in fls:
+            for x, st in fls:
                 l.append({
                     'name': os.path.basename(x),
-                    'size': os.path.getsize(x),
+                    'size': st.st_size,
                     'time': {
-                        'c': os.path.getctime(x),
-                        'm': os.path.getmtime(x)
+                        'c': st.st_ctime,
+                        'm': st.st_mtime
                     }
                 })
             cherrypy.response.headers['Content-Type'] = 'application/json'
@@ -1654,27 +1670,32 @@ def serve_pvt(*args,
                 x = int(x)
                 y = int(y)
                 q = int(q)
-                if os.path.getsize(_f) > 10000000:
-                    raise
-                from PIL import Image
+                if _st is None:
+                    _st = os.stat(_f)
                 try:
-                    image = Image.open(_f)
-                    image.thumbnail((x, y))
-                    result = image.tobytes(fmt, 'RGB', q)
+                    etag, result = eva.sfa.pvtcache.resize_image(
+                        _f, _st, x, y, q, fmt)
+                    mtime = _st.st_mtime
                 except:
-                    if not _f_alt or os.path.getsize(_f_alt) > 10000000:
+                    if not _f_alt:
                         raise
-                    image = Image.open(_f_alt)
-                    image.thumbnail((x, y))
-                    result = image.tobytes(fmt, 'RGB', q)
-                cherrypy.response.headers['Content-Type'] = 'image/' + fmt
+                    etag, result = eva.sfa.pvtcache.resize_image(
+                        _f_alt, _st_alt, x, y, q, fmt)
+                    mtime = _st_alt.st_mtime
+                headers = cherrypy.response.headers
+                headers['Content-Type'] = 'image/' + fmt
                 if nocache:
                     cp_nocache()
+                else:
+                    headers['ETag'] = f'"{etag}"'
+                    headers['Last-Modified'] = httputil.HTTPDate(mtime)
+                    cptools.validate_etags()
+                    cptools.validate_since()
                 logging.info('pvt %s file access %s' % (_r, f))
                 return result
             else:
                 raise cp_bad_request()
-        except cherrypy.HTTPError:
+        except (cherrypy.HTTPError, cherrypy.HTTPRedirect):
             raise
         except:
             eva.core.log_traceback()
@@ -7,6 +7,8 @@ import importlib
 import jinja2
 import threading
 import cherrypy
+import logging
+import os
 
 import eva.core
 from eva import apikey
@@ -20,10 +22,18 @@ from eva.api import cp_api_404
 _exposed_sfatpl_lock = threading.RLock()
 _exposed_sfatpl = {}
 
+# template environments, tpl_dir: (environment, globals version)
+_j2_envs = {}
+_j2_globals = {'version': 0, 'data': None}
+
+j2_bytecode_cache_dir = eva.core.dir_var + '/j2cache'
+
 
 def expose_sfatpl_object(n, o):
     with _exposed_sfatpl_lock:
         _exposed_sfatpl[n] = o
+        _j2_globals['version'] += 1
+        _j2_globals['data'] = None
 
 
 def _get_api():
@@ -82,9 +92,56 @@ def j2_api_call(method, params={}, k=None):
         return None
 
 
+def _get_j2_globals():
+    data = _j2_globals['data']
+    if data is None:
+        data = {
+            'state': j2_state,
+            'groups': j2_groups,
+            'api_call': j2_api_call,
+            'get_aci': get_aci,
+            'import_module': importlib.import_module
+        }
+        data.update(_exposed_sfatpl)
+        _j2_globals['data'] = data
+    return data
+
+
+def _get_j2_bytecode_cache():
+    try:
+        os.makedirs(j2_bytecode_cache_dir, exist_ok=True)
+        return jinja2.FileSystemBytecodeCache(j2_bytecode_cache_dir)
+    except:
+        logging.warning('unable to create template bytecode cache dir '
+                        f'{j2_bytecode_cache_dir}')
+        eva.core.log_traceback()
+        return None
+
+
+def get_j2_env(tpl_dir):
+    """
+    get template environment for the directory
+
+    Environments are kept, so compiled templates are cached and reloaded
+    only if the template file is modified
+    """
+    with _exposed_sfatpl_lock:
+        try:
+            j2, version = _j2_envs[tpl_dir]
+        except KeyError:
+            j2 = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(searchpath=tpl_dir),
+                bytecode_cache=_get_j2_bytecode_cache(),
+                auto_reload=True)
+            version = None
+        if version != _j2_globals['version']:
+            j2.globals.update(_get_j2_globals())
+            _j2_envs[tpl_dir] = (j2, _j2_globals['version'])
+        return j2
+
+
 def serve_j2(tpl_file, tpl_dir=eva.core.dir_ui):
-    j2_loader = jinja2.FileSystemLoader(searchpath=tpl_dir)
-    j2 = jinja2.Environment(loader=j2_loader)
+    j2 = get_j2_env(tpl_dir)
     try:
         template = j2.get_template(tpl_file)
     except:
@@ -107,14 +164,6 @@ def serve_j2(tpl_file, tpl_dir=eva.core.dir_ui):
     server_info['remote_ip'] = http_real_ip()
     env['server'] = server_info
     env.update(eva.core.cvars)
-    template.globals['state'] = j2_state
-    template.globals['groups'] = j2_groups
-    template.globals['api_call'] = j2_api_call
-    template.globals['get_aci'] = get_aci
-    template.globals['import_module'] = importlib.import_module
-    with _exposed_sfatpl_lock:
-        for n, v in _exposed_sfatpl.items():
-            template.globals[n] = v
     try:
         cherrypy.serving.response.headers[
             'Content-Type'] = 'text/html;charset=utf-8'
@@ -61,6 +61,7 @@ import eva.users
 
 import eva.notify
 import eva.registry
+import eva.benchmark
 
 from eva.tools import ConfigFile
 from eva.tools import ShellConfigFile
@@ -523,10 +524,10 @@ class LogAPI(object):
             t: get log records not older than t seconds
             n: the maximum number of log records you want to obtain
             x: regex pattern filter
+            m: get log records for the specified module only
         """
-        import pyaltt2.logs
         import eva.logs
-        l, t, n, x = parse_api_params(kwargs, 'ltnx', '.iis')
+        l, t, n, x, m = parse_api_params(kwargs, 'ltnxm', '.iiss')
         if not l:
             l = 'i'
         try:
@@ -534,7 +535,7 @@ class LogAPI(object):
         except:
             l = eva.logs.get_log_level_by_name(l)
         try:
-            return pyaltt2.logs.get(level=l, t=t, n=n, pattern=x)
+            return eva.logs.get(level=l, t=t, n=n, pattern=x, module=m)
         except Exception as e:
             raise FunctionFailed(e)
 
@@ -1381,6 +1382,29 @@ class SysAPI(CSAPI, LockAPI, CMDAPI, LogAPI, FileAPI, UserAPI, GenericAPI):
         parse_api_params(kwargs)
         return eva.core.get_exceptions()
 
+    @log_d
+    @api_need_master
+    @notify_plugins
+    def get_latency_stats(self, **kwargs):
+        """
+        get hot-path latency stats
+
+        Returns latency histogram stats (seconds) for core hot paths: item
+        state updates, notifications, decision matrix, macros, drivers and
+        API calls.
+
+        Args:
+            k: .master
+
+        Optional:
+            r: reset histograms after reading
+        """
+        r = parse_api_params(kwargs, 'r', 'b')
+        result = eva.benchmark.serialize_histograms()
+        if r:
+            eva.benchmark.reset_histograms()
+        return result
+
     @log_d
     @api_need_master
     @notify_plugins
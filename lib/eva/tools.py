@@ -72,17 +72,33 @@ def kb_uri(article_id):
     return f'https://kb.eva-ics.com/articles/{article_id}.html'
 
 
-def validate_schema(data, schema_id):
-    import jsonschema
-    import importlib
+def get_schema_validator(schema_id):
+    """
+    get compiled schema validator
+
+    Validators are compiled once and cached
+    """
     with schema_lock:
-        if schema_id in SCHEMAS:
-            schema = SCHEMAS[schema_id]
-        else:
+        try:
+            return SCHEMAS[schema_id]
+        except KeyError:
+            import jsonschema
+            import importlib
             mod = importlib.import_module(f'eva.schemas.{schema_id}')
             schema = getattr(mod, f'SCHEMA_{schema_id.upper()}')
-            SCHEMAS[schema_id] = schema
-    jsonschema.validate(data, schema=schema)
+            cls = jsonschema.validators.validator_for(schema)
+            cls.check_schema(schema)
+            validator = cls(schema)
+            SCHEMAS[schema_id] = validator
+            return validator
+
+
+def validate_schema(data, schema_id):
+    import jsonschema
+    error = jsonschema.exceptions.best_match(
+        get_schema_validator(schema_id).iter_errors(data))
+    if error is not None:
+        raise error
 
 
 def generate_template(tplc):
@@ -410,6 +426,82 @@ class MultiOrderedDict(OrderedDict):
             super().__setitem__(key, value)
 
 
+class MQTopicTrie():
+    """
+    MQTT-style topic mask trie
+
+    Masks are split into levels once, a topic is matched in time proportional
+    to its depth. Matching rules are equal to mq_topic_match
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, mask, obj):
+        node = self.root
+        for level in mask.split('/'):
+            node = node.setdefault(level, {})
+            # the rest levels after "#" are ignored
+            if level == '#':
+                break
+        node.setdefault(None, set()).add(obj)
+
+    def remove(self, mask, obj):
+        path = []
+        node = self.root
+        for level in mask.split('/'):
+            try:
+                nxt = node[level]
+            except KeyError:
+                return False
+            path.append((node, level))
+            node = nxt
+            if level == '#':
+                break
+        objs = node.get(None)
+        if not objs or obj not in objs:
+            return False
+        objs.remove(obj)
+        if not objs:
+            del node[None]
+        # remove empty branches
+        for parent, level in reversed(path):
+            if parent[level]:
+                break
+            del parent[level]
+        return True
+
+    def match(self, topic):
+        """
+        get set of objects, which masks match the topic
+        """
+        result = set()
+        levels = topic.split('/')
+        nlevels = len(levels)
+        nodes = [self.root]
+        for i, level in enumerate(levels):
+            next_nodes = []
+            for node in nodes:
+                try:
+                    result.update(node['#'][None])
+                except KeyError:
+                    pass
+                for key in (level, '+'):
+                    try:
+                        next_nodes.append(node[key])
+                    except KeyError:
+                        pass
+            if not next_nodes:
+                return result
+            nodes = next_nodes
+        for node in nodes:
+            try:
+                result.update(node[None])
+            except KeyError:
+                pass
+        return result
+
+
 class InvalidParameter(Exception):
 
     def __str__(self):
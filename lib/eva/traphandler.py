@@ -17,6 +17,13 @@ from neotasker import background_worker
 
 subscribed_items = set()
 
+# trap dispatch index: (ident var, value) -> items, items without ident vars
+# are trap candidates always
+_index = SimpleNamespace(by_ident={},
+                         unconditional=set(),
+                         keys={},
+                         lock=threading.RLock())
+
 config = SimpleNamespace(host=None, port=None, community=None, hosts_allow=[])
 entities = SimpleNamespace(snmpEngine=None)
 
@@ -56,21 +63,76 @@ def update_config(cfg):
     return True
 
 
+def _index_item(item):
+    try:
+        ident_vars = item.snmp_trap.get('ident_vars')
+    except AttributeError:
+        ident_vars = None
+    if ident_vars:
+        # any of ident vars is enough to select the item as candidate, the
+        # rest conditions are checked by the item
+        key = sorted(ident_vars.items())[0]
+        _index.by_ident.setdefault(key, set()).add(item)
+    else:
+        key = None
+        _index.unconditional.add(item)
+    _index.keys[item] = key
+
+
+def _unindex_item(item):
+    try:
+        key = _index.keys.pop(item)
+    except KeyError:
+        return
+    if key is None:
+        _index.unconditional.discard(item)
+    else:
+        items = _index.by_ident.get(key)
+        if items is not None:
+            items.discard(item)
+            if not items:
+                del _index.by_ident[key]
+
+
 def subscribe(item):
-    subscribed_items.add(item)
+    with _index.lock:
+        _unindex_item(item)
+        subscribed_items.add(item)
+        _index_item(item)
     logging.debug('%s subscribed to snmp traps' % item.oid)
     return True
 
 
 def unsubscribe(item):
-    try:
-        subscribed_items.remove(item)
-        logging.debug('%s unsubscribed from snmp traps' % item.oid)
-    except:
-        return False
+    with _index.lock:
+        _unindex_item(item)
+        try:
+            subscribed_items.remove(item)
+        except:
+            return False
+    logging.debug('%s unsubscribed from snmp traps' % item.oid)
     return True
 
 
+def get_trap_candidates(data):
+    """
+    get items, which may process the trap with the given data
+    """
+    with _index.lock:
+        result = _index.unconditional.copy()
+        if _index.by_ident:
+            for key in data.items():
+                items = _index.by_ident.get(key)
+                if items:
+                    result.update(items)
+    return result
+
+
+def _t_dispatch(host, data, items):
+    for i in items:
+        i.process_snmp_trap(host, data)
+
+
 def __cbFun(snmpEngine, stateReference, contextEngineId, contextName, varBinds,
             cbCtx):
     transportDomain, transportAddress = \
@@ -87,8 +149,9 @@ def __cbFun(snmpEngine, stateReference, contextEngineId, contextName, varBinds,
         logging.debug('snmp trap host: %s, data %s = %s' % \
                 (host, name.prettyPrint(), val.prettyPrint()))
         data[name.prettyPrint()] = val.prettyPrint()
-    for i in subscribed_items:
-        eva.core.spawn(i.process_snmp_trap, host, data)
+    items = get_trap_candidates(data)
+    if items:
+        eva.core.spawn(_t_dispatch, host, data, items)
 
 
 def start():
@@ -14,6 +14,8 @@ import sqlalchemy as sa
 from sqlalchemy import text as sql
 
 import eva.core
+import eva.pollscheduler
+import eva.runner
 import eva.uc.ucqueue
 import eva.uc.unit
 import eva.uc.sensor
@@ -286,22 +288,55 @@ def save():
     return True
 
 
+def _get_item_registry_state(item):
+    return {
+        'oid': item.oid,
+        'set-time': item.set_time,
+        'ieid': item.ieid,
+        'status': item.status,
+        'value': item.value
+    }
+
+
 @with_item_lock
 def save_item_state_to_registry(item):
     try:
-        eva.registry.key_set(
-            item.get_rskn(), {
-                'oid': item.oid,
-                'set-time': item.set_time,
-                'ieid': item.ieid,
-                'status': item.status,
-                'value': item.value
-            })
+        eva.registry.key_set(item.get_rskn(), _get_item_registry_state(item))
     except:
         logging.critical('registry error')
         return False
 
 
+@with_item_lock
+def save_items_state(items):
+    """
+    save states of the items in a single registry batch / db transaction
+    """
+    if not items:
+        return True
+    if eva.core.config.state_to_registry:
+        try:
+            eva.registry.key_set_batch([
+                (i.get_rskn(), _get_item_registry_state(i)) for i in items
+            ])
+            return True
+        except:
+            logging.critical('registry error')
+            return False
+    db = eva.core.db()
+    dbt = db.begin()
+    try:
+        for i in items:
+            if not save_item_state(i, db):
+                raise FunctionFailed
+        dbt.commit()
+        return True
+    except:
+        dbt.rollback()
+        logging.critical('db error')
+        return False
+
+
 @with_item_lock
 def save_item_state(item, db=None):
     if eva.core.config.state_to_registry:
@@ -527,13 +562,7 @@ def load_mu(start=False):
         return False
 
 
-@with_item_lock
-def create_item(item_id,
-                item_type,
-                group=None,
-                start=True,
-                create=False,
-                save=False):
+def _build_item(item_id, item_type, group=None, create=False):
     if not item_id:
         raise InvalidParameter('item id not specified')
     if group and item_id.find('/') != -1:
@@ -568,6 +597,17 @@ def create_item(item_id,
     if eva.core.config.mqtt_update_default:
         cfg['mqtt_update'] = eva.core.config.mqtt_update_default
     item.update_config(cfg)
+    return item
+
+
+@with_item_lock
+def create_item(item_id,
+                item_type,
+                group=None,
+                start=True,
+                create=False,
+                save=False):
+    item = _build_item(item_id, item_type, group=group, create=create)
     append_item(item, start=start)
     if save:
         item.save()
@@ -575,6 +615,96 @@ def create_item(item_id,
     return item
 
 
+@with_item_lock
+def save_items(items):
+    """
+    save configurations of the items in a single registry batch
+    """
+    if items:
+        eva.registry.key_set_batch([
+            (i.get_rkn(), i.serialize(config=True)) for i in items
+        ])
+        for i in items:
+            i.config_changed = False
+            i.config_file_exists = True
+    return True
+
+
+@with_item_lock
+def deploy_items(items, save=False):
+    """
+    deploy items in a single batch
+
+    Items are created and configured in memory first, if any item can not be
+    created, nothing is deployed. Then the items are registered, their
+    configurations are saved in a single registry batch and processors are
+    started. If the batch fails, the items are unregistered and the keys,
+    written before the failure, are deleted
+
+    Args:
+        items: list of (oid, props) tuples, only units and sensors are
+            supported
+        save: save item configurations
+
+    Returns:
+        list of deployed items
+    """
+    result = []
+    ids = set()
+    try:
+        for oid, props in items:
+            tp, i = parse_oid(oid)
+            if tp not in ['unit', 'sensor']:
+                raise InvalidParameter(f'unable to deploy {oid}')
+            item = _build_item(i, tp, create=True)
+            # props may subscribe the item to drivers, traps and notifiers,
+            # so it must be discarded on failure
+            result.append(item)
+            i = item.full_id if eva.core.config.enterprise_layout else \
+                    item.item_id
+            if i in ids:
+                raise ResourceAlreadyExists(oid)
+            ids.add(i)
+            if props:
+                for p, v in props.items():
+                    if not item.set_prop(p, v, False):
+                        raise FunctionFailed(f'{oid}.{p} = {v} unable to set')
+    except:
+        for item in result:
+            _discard_item(item)
+        raise
+    for item in result:
+        append_item(item, start=False)
+    if save:
+        try:
+            save_items(result)
+        except:
+            for item in result:
+                _unregister_item(item)
+                _discard_item(item)
+                try:
+                    eva.registry.key_delete(item.get_rkn())
+                except KeyError:
+                    pass
+                except:
+                    logging.error(f'Can not remove {item.oid} config')
+                    eva.core.log_traceback()
+            raise
+    for item in result:
+        item.start_processors()
+        logging.info('created new %s %s' % (item.item_type, item.full_id))
+    return result
+
+
+def _discard_item(item):
+    # destroy the item, which has never been started or announced
+    item._destroyed = True
+    try:
+        item.stop_processors()
+    except:
+        eva.core.log_traceback()
+
+
 @with_item_lock
 def create_unit(unit_id, group=None, enabled=None, save=False):
     unit = create_item(item_id=unit_id,
@@ -680,6 +810,36 @@ def destroy_group(group=None):
     return True
 
 
+def _unregister_item(i):
+    if not eva.core.config.enterprise_layout:
+        del items_by_id[i.item_id]
+    del items_by_full_id[i.full_id]
+    del items_by_group[i.group][i.item_id]
+    if i.item_type == 'unit':
+        if not eva.core.config.enterprise_layout:
+            del units_by_id[i.item_id]
+        del units_by_full_id[i.full_id]
+        del units_by_group[i.group][i.item_id]
+        if not units_by_group[i.group]:
+            del units_by_group[i.group]
+    if i.item_type == 'sensor':
+        if not eva.core.config.enterprise_layout:
+            del sensors_by_id[i.item_id]
+        del sensors_by_full_id[i.full_id]
+        del sensors_by_group[i.group][i.item_id]
+        if not sensors_by_group[i.group]:
+            del sensors_by_group[i.group]
+    if i.item_type == 'mu':
+        if not eva.core.config.enterprise_layout:
+            del mu_by_id[i.item_id]
+        del mu_by_full_id[i.full_id]
+        del mu_by_group[i.group][i.item_id]
+        if not mu_by_group[i.group]:
+            del mu_by_group[i.group]
+    if not items_by_group[i.group]:
+        del items_by_group[i.group]
+
+
 @with_item_lock
 def destroy_item(item):
     try:
@@ -689,33 +849,7 @@ def destroy_item(item):
                 raise ResourceNotFound
         else:
             i = item
-        if not eva.core.config.enterprise_layout:
-            del items_by_id[i.item_id]
-        del items_by_full_id[i.full_id]
-        del items_by_group[i.group][i.item_id]
-        if i.item_type == 'unit':
-            if not eva.core.config.enterprise_layout:
-                del units_by_id[i.item_id]
-            del units_by_full_id[i.full_id]
-            del units_by_group[i.group][i.item_id]
-            if not units_by_group[i.group]:
-                del units_by_group[i.group]
-        if i.item_type == 'sensor':
-            if not eva.core.config.enterprise_layout:
-                del sensors_by_id[i.item_id]
-            del sensors_by_full_id[i.full_id]
-            del sensors_by_group[i.group][i.item_id]
-            if not sensors_by_group[i.group]:
-                del sensors_by_group[i.group]
-        if i.item_type == 'mu':
-            if not eva.core.config.enterprise_layout:
-                del mu_by_id[i.item_id]
-            del mu_by_full_id[i.full_id]
-            del mu_by_group[i.group][i.item_id]
-            if not mu_by_group[i.group]:
-                del mu_by_group[i.group]
-        if not items_by_group[i.group]:
-            del items_by_group[i.group]
+        _unregister_item(i)
         i.destroy()
         if eva.core.config.auto_save:
             if i.config_file_exists:
@@ -847,6 +981,8 @@ def stop():
     # save()
     for i, v in items_by_full_id.copy().items():
         v.stop_processors()
+    eva.pollscheduler.stop()
+    eva.runner.stop_persistent_workers()
     if Q:
         Q.stop()
     eva.uc.driverapi.stop()
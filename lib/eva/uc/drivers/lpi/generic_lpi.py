@@ -28,6 +28,8 @@ import uuid
 import sys
 import timeouter
 
+from concurrent.futures import Future
+
 from eva.uc.driverapi import get_polldelay
 from eva.uc.driverapi import get_timeout
 from eva.uc.driverapi import critical
@@ -152,6 +154,7 @@ class LPI(GenericX):
         e = self.__terminate.get(_uuid)
         if not e:
             self.critical('termination engine broken')
+            return True
         return e.is_set()
 
     """
@@ -167,12 +170,11 @@ class LPI(GenericX):
     """
 
     def delay(self, _uuid, sec):
-        t_end = time.perf_counter() + sec
-        while time.perf_counter() < t_end:
-            if self.need_terminate(_uuid):
-                return False
-            time.sleep(get_polldelay())
-        return not self.need_terminate(_uuid)
+        e = self.__terminate.get(_uuid)
+        if not e:
+            self.critical('termination engine broken')
+            return False
+        return not e.wait(timeout=sec)
 
     def action_result_terminated(self, _uuid):
         return self.action_result(_uuid, -15, '', '')
@@ -198,11 +200,11 @@ class LPI(GenericX):
         return False
 
     def set_result(self, _uuid, result=None):
-        if not self.__results_lock.acquire(timeout=get_timeout()):
-            self.critical('GenericLPI::set_result locking broken')
-            return None
-        self.__results[_uuid] = result
-        self.__results_lock.release()
+        f = self.__results.get(_uuid)
+        if f is None or f.done():
+            f = Future()
+            self.__results[_uuid] = f
+        f.set_result(result)
         return True
 
     def log_debug(self, msg):
@@ -244,10 +246,9 @@ class LPI(GenericX):
         else:
             self.lpi_cfg = {}
         self.default_tki_diff = 2
+        # action termination events and result futures, by action uuid
         self.__terminate = {}
         self.__results = {}
-        self.__terminate_lock = threading.Lock()
-        self.__results_lock = threading.Lock()
 
         mod = kwargs.get('_xmod')
         self.__xmod__ = mod
@@ -328,59 +329,42 @@ class LPI(GenericX):
 
     def prepare_action(self, _uuid):
         self._append_terminate(_uuid)
-        self.set_result(_uuid)
+        self.__results[_uuid] = Future()
 
     def terminate(self, _uuid):
-        if not self.__terminate_lock.acquire(timeout=get_timeout()):
-            self.critical('GenericLPI::terminate locking broken')
-            return None
         t = self.__terminate.get(_uuid)
         if not t:
-            self.__terminate_lock.release()
             return False
         t.set()
-        self.__terminate_lock.release()
         return True
 
     def _append_terminate(self, _uuid):
-        if not self.__terminate_lock.acquire(timeout=get_timeout()):
-            self.critical('GenericLPI::_append_terminate locking broken')
-            return None
         self.__terminate[_uuid] = threading.Event()
-        self.__terminate_lock.release()
         return True
 
     def _remove_terminate(self, _uuid):
-        if not self.__terminate_lock.acquire(timeout=get_timeout()):
-            self.critical('GenericLPI::_remove_terminate locking broken')
-            return None
-        try:
-            del (self.__terminate[_uuid])
-        except:
-            self.__terminate_lock.release()
-            return False
-        self.__terminate_lock.release()
-        return True
+        return self.__terminate.pop(_uuid, None) is not None
 
     def clear_result(self, _uuid):
-        if not self.__results_lock.acquire(timeout=get_timeout()):
-            self.critical('GenericLPI::clear_result locking broken')
+        return self.__results.pop(_uuid, None) is not None
+
+    def get_result_future(self, _uuid):
+        """
+        Returns concurrent.futures.Future object of action/state result or None
+        if no result is expected
+        """
+        return self.__results.get(_uuid)
+
+    def get_result(self, _uuid, timeout=None):
+        f = self.__results.get(_uuid)
+        if f is None:
             return None
+        if timeout is None:
+            return f.result() if f.done() else None
         try:
-            del (self.__results[_uuid])
+            return f.result(timeout=timeout)
         except:
-            self.__results_lock.release()
-            return False
-        self.__results_lock.release()
-        return True
-
-    def get_result(self, _uuid):
-        if not self.__results_lock.acquire(timeout=get_timeout()):
-            self.critical('GenericLPI::get_result locking broken')
             return None
-        result = self.__results.get(_uuid)
-        self.__results_lock.release()
-        return result
 
     def prepare_phi_cfg(self, cfg):
         phi_cfg = {}
@@ -27,6 +27,7 @@ import rapidjson
 import timeouter as to
 
 import eva.core
+import eva.pollscheduler
 
 from eva.uc.driverapi import critical
 from eva.uc.driverapi import get_polldelay
@@ -335,22 +336,24 @@ class PHI(GenericX):
             self._update_processor.set_name('phi_update_processor:{}'.format(
                 self.oid))
             self._update_processor.start()
-            self._update_scheduler = task_supervisor.create_async_job(
-                target=self._job_update_scheduler,
-                interval=self._update_interval)
+            self._update_scheduler = eva.pollscheduler.register(
+                self.oid,
+                self._update_interval,
+                self._poll_update,
+                group='phi:' + self.phi_id)
 
     def _stop_processors(self):
         if self._update_scheduler:
-            self._update_scheduler.cancel()
+            eva.pollscheduler.unregister(self._update_scheduler)
             self._update_scheduler = None
         self._update_processor.stop()
 
     def _stop(self):
         return self.stop()
 
-    async def _job_update_scheduler(self):
+    def _poll_update(self):
         self.log_debug('scheduling update')
-        await self._update_processor.trigger()
+        self._update_processor.trigger_threadsafe()
 
     async def _run_update_processor(self, **kwargs):
         if not self.__update_active:
@@ -13,8 +13,11 @@ Public License v3.
 
 import threading
 import logging
+import time
 import timeouter as to
 
+import eva.core
+
 from eva.core import log_traceback, config as core_config
 
 if not core_config.development:
@@ -31,6 +34,8 @@ except:
 
 from types import GeneratorType
 
+from eva.tools import SimpleNamespace
+
 
 class SafeProxy(proxy):
     """
@@ -85,6 +90,136 @@ class SafeProxy(proxy):
                 f'Unable to communicate with EnIP ({self.host}:{self.port})')
 
 
+class ENIPSession:
+    """
+    Persistent EtherNet/IP session
+
+    Keeps the connection (and registered session) open between calls. Tag
+    operations, requested by concurrent callers while the previous batch is
+    processed, are sent to the device together in the next batch.
+    """
+
+    def __init__(self, host, port, udp, broadcast, timeout):
+        self.host = host
+        self.port = port
+        self.udp = udp
+        self.broadcast = broadcast
+        self.timeout = timeout
+        self.connection = None
+        self.cond = threading.Condition()
+        self.pending = []
+        self.busy = False
+
+    def connect(self):
+        self.connection = connector(host=self.host,
+                                    port=self.port,
+                                    timeout=self.timeout,
+                                    udp=self.udp,
+                                    broadcast=self.broadcast)
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except:
+                log_traceback()
+            self.connection = None
+
+    def _process(self, operations, params):
+        for x in range(2):
+            if self.connection is None:
+                self.connect()
+            try:
+                return self.connection.process(operations=operations,
+                                               printing=False,
+                                               timeout=self.timeout,
+                                               **params)
+            except:
+                # the session is broken, re-register it and retry
+                self.close()
+                if x:
+                    raise
+
+    def _execute(self, batch, params):
+        operations = []
+        for req in batch:
+            operations += req.operations
+        try:
+            failed, transactions = self._process(operations, params)
+        except Exception as e:
+            for req in batch:
+                req.error = e
+            return
+        pos = 0
+        for req in batch:
+            req.result = transactions[pos:pos + len(req.operations)]
+            req.failures = sum(1 for t in req.result if t is None)
+            pos += len(req.operations)
+        # operations without transactions have been failed
+        for req in batch:
+            req.failures += len(req.operations) - len(req.result)
+
+    def operate(self, operations, params, timeout):
+        req = SimpleNamespace(operations=operations,
+                              result=None,
+                              failures=0,
+                              error=None,
+                              done=False)
+        t_end = time.perf_counter() + timeout
+        with self.cond:
+            self.pending.append(req)
+            while not req.done:
+                if not self.busy:
+                    self.busy = True
+                    batch = self.pending
+                    self.pending = []
+                    self.cond.release()
+                    try:
+                        self._execute(batch, params)
+                    finally:
+                        self.cond.acquire()
+                        for r in batch:
+                            r.done = True
+                        self.busy = False
+                        self.cond.notify_all()
+                else:
+                    t = t_end - time.perf_counter()
+                    if t <= 0:
+                        if req in self.pending:
+                            self.pending.remove(req)
+                            raise TimeoutError
+                        # is being processed, wait for the batch
+                        t = None
+                    self.cond.wait(timeout=t)
+        if req.error is not None:
+            raise req.error
+        return req.result, req.failures
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(host, port, udp, broadcast, timeout, params):
+    key = (host, port, udp, broadcast, timeout, tuple(sorted(params.items())))
+    with _sessions_lock:
+        try:
+            return _sessions[key]
+        except KeyError:
+            session = ENIPSession(host, port, udp, broadcast, timeout)
+            _sessions[key] = session
+            return session
+
+
+@eva.core.stop
+def close_sessions():
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for s in sessions:
+        s.close()
+
+
 def operate(host='localhost',
             port=44818,
             tags=[],
@@ -99,7 +234,8 @@ def operate(host='localhost',
             simple=False,
             multiple=False,
             priority_time_tick=5,
-            timeout_ticks=157):
+            timeout_ticks=157,
+            persistent=True):
     """
     Read/write specified EthernetIP tags
 
@@ -131,6 +267,8 @@ def operate(host='localhost',
             32768ms
         timeout_ticks: timeout duration ticks in range (1,255) (default: 157 ==
             5024ms)
+        persistent: use persistent session, operations of concurrent calls
+            are batched (default: True)
     Returns:
         tuple (result, failures) where result is a list of operation results
         (lists for get, True for set) and failures is a number of failed
@@ -147,6 +285,18 @@ def operate(host='localhost',
                                       else [] if simple else None
     send_path   = send_path                if send_path \
                                       else '' if simple else None
+    if persistent:
+        if not tags:
+            return [], 0
+        operations = list(
+            parse_operations(recycle(tags, times=repeat),
+                             route_path=route_path,
+                             send_path=send_path,
+                             timeout_ticks=timeout_ticks,
+                             priority_time_tick=priority_time_tick))
+        params = {'depth': depth, 'multiple': multiple, 'fragment': fragment}
+        return get_session(host, port, udp, broadcast, timeout,
+                           params).operate(operations, params, timeout)
     failures = 0
     transactions = []
     with connector(host=addr[0],
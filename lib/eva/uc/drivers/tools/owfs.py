@@ -9,6 +9,10 @@ __version__ = "3.4.2"
 
 from eva.uc.owfs import is_bus
 from eva.uc.owfs import get_bus as _get_bus
+from eva.uc.owfs import read_async
+
+import eva.core
+import time
 
 from eva.exceptions import ResourceNotFound
 from eva.exceptions import ResourceBusy
@@ -36,3 +40,35 @@ def get_bus(bus_id, timeout=None):
         raise RuntimeError(f'OWFS bus {bus_id} connection error')
     elif bus == 0:
         raise ResourceBusy(f'OWFS bus {bus_id} is locked')
+
+
+def read_bulk(bus_id, items, uncached=False, timeout=None):
+    """
+    Read multiple attributes via OWFS bus scheduler
+
+    Reads are grouped with ones, scheduled by other PHIs, and performed in a
+    single bus pass. The bus must not be acquired by the caller.
+
+    Args:
+        bus_id: OWFS bus ID
+        items: list of (path, attr) tuples
+        uncached: read uncached values
+        timeout: max operation time (default: core timeout)
+
+    Returns:
+        dict (path, attr): value (None if read failed)
+
+    Raises:
+        eva.exceptions.ResourceNotFound: if the bus doesn't exist
+        concurrent.futures.TimeoutError: if the values weren't read in time
+    """
+    if timeout is None:
+        timeout = eva.core.config.timeout
+    futures = {
+        i: read_async(bus_id, i[0], i[1], uncached=uncached) for i in items
+    }
+    t_end = time.perf_counter() + timeout
+    return {
+        k: f.result(timeout=max(t_end - time.perf_counter(), 0))
+        for k, f in futures.items()
+    }
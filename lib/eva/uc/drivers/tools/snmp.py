@@ -4,10 +4,185 @@ __license__ = "Apache License 2.0"
 __version__ = "3.4.2"
 
 # SNMP get/set module. Supports SNMPv1 and 2
+#
+# requests are executed with the synchronous pysnmp engine, get_async runs
+# them in the core thread pool, so requests to many targets run concurrently.
+# SNMP engines are not thread-safe and are kept per thread, sessions (auth
+# data and transport targets) are cached per target, multiple OIDs are packed
+# into a single GET PDU, walk uses GETBULK (SNMPv2).
 
 import pysnmp.hlapi as snmp_engine
 import logging
+import threading
+
+import eva.core
+
 from eva.uc.driverapi import log_traceback
+from eva.tools import SimpleNamespace
+
+# max OIDs in a single GET PDU
+max_oids_per_pdu = 32
+# GETBULK max-repetitions for walk
+max_repetitions = 25
+
+_d = SimpleNamespace(sessions={}, lock=threading.Lock())
+
+_engines = threading.local()
+
+
+def _get_engine():
+    try:
+        return _engines.engine
+    except AttributeError:
+        _engines.engine = snmp_engine.SnmpEngine()
+        return _engines.engine
+
+
+def _get_session(host, port, community, timeout, retries, snmp_ver):
+    key = (host, port, community, timeout, retries, snmp_ver)
+    with _d.lock:
+        try:
+            return _d.sessions[key]
+        except KeyError:
+            pass
+    session = SimpleNamespace(
+        auth=snmp_engine.CommunityData(community, mpModel=snmp_ver - 1),
+        target=snmp_engine.UdpTransportTarget((host, port),
+                                              timeout=timeout,
+                                              retries=retries),
+        ctx=snmp_engine.ContextData(),
+        snmp_ver=snmp_ver)
+    with _d.lock:
+        return _d.sessions.setdefault(key, session)
+
+
+def _format_value(v, rf):
+    if v is None or rf is None:
+        return v
+    try:
+        _v = str(v[1])
+    except:
+        return None
+    try:
+        if rf is float: _v = float(_v)
+        if rf is int: _v = int(_v)
+    except:
+        _v = None
+    return _v
+
+
+def _get(oids, rf, *args):
+    engine = _get_engine()
+    s = _get_session(*args)
+    result = []
+    for i in range(0, len(oids), max_oids_per_pdu):
+        c = oids[i:i + max_oids_per_pdu]
+        err_i, err_st, err_idx, vals = next(
+            snmp_engine.getCmd(
+                engine, s.auth, s.target, s.ctx,
+                *(snmp_engine.ObjectType(snmp_engine.ObjectIdentity(oid))
+                  for oid in c)))
+        if err_i or err_st:
+            logging.debug('snmp error: %s' % (err_i if err_i else err_st))
+            result += [None] * len(c)
+        else:
+            result += [_format_value(v, rf) for v in vals]
+    return result
+
+
+def _walk(oid, *args):
+    engine = _get_engine()
+    s = _get_session(*args)
+    vb = snmp_engine.ObjectType(snmp_engine.ObjectIdentity(oid))
+    if s.snmp_ver == 1:
+        walker = snmp_engine.nextCmd(engine,
+                                     s.auth,
+                                     s.target,
+                                     s.ctx,
+                                     vb,
+                                     lexicographicMode=False)
+    else:
+        walker = snmp_engine.bulkCmd(engine,
+                                     s.auth,
+                                     s.target,
+                                     s.ctx,
+                                     0,
+                                     max_repetitions,
+                                     vb,
+                                     lexicographicMode=False)
+    result = []
+    for err_i, err_st, err_idx, vals in walker:
+        if err_i or err_st:
+            logging.debug('snmp error: %s' % (err_i if err_i else err_st))
+            return
+        result += vals
+    return result
+
+
+def _set(oid, value, *args):
+    engine = _get_engine()
+    s = _get_session(*args)
+    err_i, err_st, err_idx, vals = next(
+        snmp_engine.setCmd(
+            engine, s.auth, s.target, s.ctx,
+            snmp_engine.ObjectType(snmp_engine.ObjectIdentity(oid), value)))
+    if err_i or err_st:
+        logging.debug('snmp error: %s' % (err_i if err_i else err_st))
+        return None
+    return True
+
+
+def get_async(oids,
+              host,
+              port=161,
+              community='public',
+              timeout=0,
+              retries=0,
+              rf=str,
+              snmp_ver=2):
+    """
+    Schedule SNMP get of multiple OIDs
+
+    The request is executed in the core thread pool, OIDs are packed into GET
+    PDUs (up to max_oids_per_pdu OIDs per PDU)
+
+    Args:
+        oids: list of SNMP OIDs or MIB names
+        other args: the same as for get
+
+    Returns:
+        concurrent.futures.Future object, the result is list of values (None
+        for values which can not be obtained)
+    """
+    return eva.core.spawn(get_many, list(oids), host, port, community,
+                          timeout, retries, rf, snmp_ver)
+
+
+def get_many(oids,
+             host,
+             port=161,
+             community='public',
+             timeout=0,
+             retries=0,
+             rf=str,
+             snmp_ver=2):
+    """
+    Get multiple OIDs in a single request
+
+    Args:
+        oids: list of SNMP OIDs or MIB names
+        other args: the same as for get
+
+    Returns:
+        list of values (None for values which can not be obtained)
+    """
+    oids = list(oids)
+    try:
+        return _get(oids, rf, host, port, community, timeout, retries,
+                    snmp_ver)
+    except:
+        log_traceback()
+        return [None] * len(oids)
 
 
 def get(oid,
@@ -37,37 +212,12 @@ def get(oid,
 
         If walk is requested, list of pysnmp objects is returned
     """
-    result = []
-    snmpfunc = snmp_engine.nextCmd if walk else snmp_engine.getCmd
+    args = (host, port, community, timeout, retries, snmp_ver)
     try:
-        for (err_i, err_st, err_idx, vals) in snmpfunc(
-                snmp_engine.SnmpEngine(),
-                snmp_engine.CommunityData(community, mpModel=snmp_ver - 1),
-                snmp_engine.UdpTransportTarget(
-                    (host, port), timeout=timeout, retries=retries),
-                snmp_engine.ContextData(),
-                snmp_engine.ObjectType(snmp_engine.ObjectIdentity(oid)),
-                lexicographicMode=False):
-            if err_i or err_st:
-                logging.debug('snmp error: %s' % err_i)
-                return
-            else:
-                for v in vals:
-                    if walk:
-                        result.append(v)
-                    else:
-                        if rf is None: return v
-                        try:
-                            _v = str(v[1])
-                            try:
-                                if rf is float: _v = float(_v)
-                                if rf is int: _v = int(_v)
-                            except:
-                                _v = None
-                            return _v
-                        except:
-                            return
-        return result
+        if walk:
+            return _walk(oid, *args)
+        else:
+            return _get([oid], rf, *args)[0]
     except:
         log_traceback()
         return
@@ -96,18 +246,8 @@ def set(oid,
         True if value is set, False if not
     """
     try:
-        for (err_i, err_st, err_idx, vals) in snmp_engine.setCmd(
-                snmp_engine.SnmpEngine(),
-                snmp_engine.CommunityData(community, mpModel=snmp_ver - 1),
-                snmp_engine.UdpTransportTarget(
-                    (host, port), timeout=timeout, retries=retries),
-                snmp_engine.ContextData(),
-                snmp_engine.ObjectType(snmp_engine.ObjectIdentity(oid), value)):
-            if err_i or err_st:
-                logging.debug('snmp error: %s' % err_i)
-                return None
-            else:
-                return True
+        return _set(oid, value, host, port, community, timeout, retries,
+                    snmp_ver)
     except:
         log_traceback()
         return False
@@ -5,6 +5,9 @@ __version__ = "3.4.2"
 
 default_delay = 0.05
 
+# attributes, which support simultaneous conversion
+simultaneous_attrs = ('temperature',)
+
 import importlib
 import logging
 import rapidjson
@@ -12,6 +15,8 @@ import threading
 import time
 import re
 
+from concurrent.futures import Future
+
 import eva.core
 import eva.registry
 
@@ -69,6 +74,31 @@ def get_bus(bus_id, timeout=None):
     return bus if result else result
 
 
+def read_async(bus_id, path, attr, uncached=False):
+    """Schedule OWFS bus attribute read
+
+    Reads, scheduled by all callers, are grouped and performed by the bus
+    scheduler in a single bus pass. The bus must not be acquired by the caller.
+
+    Args:
+      bus_id: owfs bus ID
+      path: equipment path
+      attr: attribute to read
+      uncached: read uncached value
+
+    Returns:
+      concurrent.futures.Future object, the result is attribute value or None
+      if read failed
+
+    Raises:
+      ResourceNotFound: if bus doesn't exist
+    """
+    bus = _get_bus(bus_id)
+    if not bus:
+        raise ResourceNotFound
+    return bus.read_async(path, attr, uncached=uncached)
+
+
 # private functions
 
 
@@ -216,6 +246,10 @@ class OWFSBus(object):
         self.location = location
         self.locker = threading.Lock()
         self.last_action = 0
+        self.sched_cond = threading.Condition()
+        self.sched_pending = {}
+        self.sched_active = False
+        self.sched_thread = None
         try:
             onewire = importlib.import_module('onewire')
         except:
@@ -260,6 +294,114 @@ class OWFSBus(object):
                 pass
         return False
 
+    @staticmethod
+    def _attr_path(path, attr, uncached=False):
+        p = path + '/' + attr
+        if uncached:
+            p = ('/uncached' if p.startswith('/') else 'uncached/') + p
+        return p
+
+    def read_bulk(self, items, uncached=False):
+        """
+        read multiple attributes in a single bus pass
+
+        If more than one attribute, supporting simultaneous conversion, is
+        read, the conversion is triggered once for all equipment on the bus.
+        Failed reads are retried in the next pass.
+
+        Args:
+            items: list of (path, attr) tuples
+            uncached: read uncached values
+
+        Returns:
+            dict (path, attr): value (None if read failed)
+        """
+        result = {}
+        pending = list(dict.fromkeys(items))
+        for a in simultaneous_attrs:
+            if sum(1 for _, attr in pending if attr.startswith(a)) > 1:
+                self.sleep()
+                try:
+                    self._ow.set('simultaneous/' + a, '1')
+                except:
+                    logging.debug(f'owfs bus {self.bus_id}: '
+                                  f'simultaneous/{a} failed')
+        for i in range(self.tries):
+            self.sleep()
+            failed = []
+            for path, attr in pending:
+                try:
+                    value = self._ow.get(self._attr_path(path, attr, uncached))
+                except:
+                    value = None
+                if value is None:
+                    failed.append((path, attr))
+                else:
+                    result[(path, attr)] = value
+            self.last_action = time.time()
+            pending = failed
+            if not pending:
+                break
+        for k in pending:
+            result[k] = None
+        return result
+
+    def read_async(self, path, attr, uncached=False):
+        f = Future()
+        with self.sched_cond:
+            if not self.sched_active:
+                self.sched_active = True
+                self.sched_thread = threading.Thread(
+                    target=self._t_scheduler,
+                    name=f'owfs_scheduler_{self.bus_id}',
+                    daemon=True)
+                self.sched_thread.start()
+            self.sched_pending.setdefault((path, attr, uncached),
+                                          []).append(f)
+            self.sched_cond.notify()
+        return f
+
+    def _t_scheduler(self):
+        logging.debug(f'owfs bus {self.bus_id} scheduler started')
+        while True:
+            with self.sched_cond:
+                while self.sched_active and not self.sched_pending:
+                    self.sched_cond.wait()
+                if not self.sched_active:
+                    break
+            # collect reads, scheduled by other callers
+            time.sleep(self.delay)
+            with self.sched_cond:
+                pending = self.sched_pending
+                self.sched_pending = {}
+            result = {}
+            if self.acquire():
+                try:
+                    for uncached in (False, True):
+                        items = [(p, a) for p, a, u in pending if u == uncached]
+                        if items:
+                            for (p, a), v in self.read_bulk(
+                                    items, uncached=uncached).items():
+                                result[(p, a, uncached)] = v
+                except:
+                    eva.core.log_traceback()
+                finally:
+                    self.release()
+            else:
+                logging.error(f'owfs bus {self.bus_id} scheduler: '
+                              'unable to acquire bus')
+            for k, futures in pending.items():
+                v = result.get(k)
+                for f in futures:
+                    f.set_result(v)
+        with self.sched_cond:
+            pending = self.sched_pending
+            self.sched_pending = {}
+        for futures in pending.values():
+            for f in futures:
+                f.cancel()
+        logging.debug(f'owfs bus {self.bus_id} scheduler stopped')
+
     def sleep(self):
         a = time.time()
         if a < self.last_action + self.delay:
@@ -282,6 +424,9 @@ class OWFSBus(object):
         return d
 
     def stop(self):
+        with self.sched_cond:
+            self.sched_active = False
+            self.sched_cond.notify()
         try:
             if self._ow:
                 self._ow.finish()
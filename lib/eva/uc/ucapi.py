@@ -978,16 +978,25 @@ class UC_API(GenericAPI):
                 except:
                     raise InvalidParameter('no id field for mu')
                 self.create_mu(k=_k, i=i, g=g, save=save)
+        if 'units' in cfg or 'sensors' in cfg or 'mu' in cfg:
+            return self._do_update_device(cfg=cfg,
+                                          save=save,
+                                          validate_config=False)
         # common format
-        if 'units' not in cfg and 'sensors' not in cfg and 'mu' not in cfg:
-            validate_schema(cfg, 'device')
+        validate_schema(cfg, 'device')
+        self._set_device_cvars(_k, cfg)
+        to_deploy = []
         for item_type in ['unit', 'sensor']:
             items = cfg.get(item_type)
             if items:
-                for oid in items:
+                for oid, item in items.items():
                     oid = f'{item_type}:{oid}'
-                    self.create(k=_k, i=oid)
-        return self._do_update_device(cfg=cfg, save=save, validate_config=False)
+                    to_deploy.append(
+                        (oid, self._get_device_item_props(oid, item_type, item)
+                         if item else None))
+        eva.uc.controller.deploy_items(to_deploy, save=save)
+        self._set_device_items_state(_k, cfg)
+        return True
 
     @log_i
     @api_need_device
@@ -1067,6 +1076,30 @@ class UC_API(GenericAPI):
                 'units' not in cfg and \
                 'sensors' not in cfg and 'mu' not in cfg:
             validate_schema(cfg, 'device')
+        self._set_device_cvars(_k, cfg)
+        to_save = []
+        for item_type in ['unit', 'sensor']:
+            items = cfg.get(item_type)
+            if items:
+                for oid, item in items.items():
+                    if item:
+                        oid = f'{item_type}:{oid}'
+                        i = eva.uc.controller.get_item(oid)
+                        if not i:
+                            raise ResourceNotFound(oid)
+                        self._set_prop(i, 'snmp_trap')
+                        self._set_prop(
+                            i,
+                            v=self._get_device_item_props(
+                                oid, item_type, item))
+                        to_save.append(i)
+        if save:
+            eva.uc.controller.save_items(to_save)
+        self._set_device_items_state(_k, cfg)
+        return True
+
+    @staticmethod
+    def _set_device_cvars(k, cfg):
         controllers = cfg.get('controller')
         if controllers:
             c = controllers.get(eva.core.config.controller_name)
@@ -1074,46 +1107,43 @@ class UC_API(GenericAPI):
                 cvars = c.get('cvar')
                 if cvars:
                     for i, v in cvars.items():
-                        if not eva.sysapi.api.set_cvar(k=_k, i=i, v=v):
+                        if not eva.sysapi.api.set_cvar(k=k, i=i, v=v):
                             raise FunctionFailed
+
+    def _get_device_item_props(self, oid, item_type, item):
+        props = item.copy()
+        for p in ['controller', 'status', 'value']:
+            try:
+                del props[p]
+            except KeyError:
+                pass
+        for i in props.copy():
+            if i.startswith('__'):
+                del props[i]
+        driver_config = props.pop('driver', None)
+        if driver_config:
+            try:
+                driver_id = driver_config['id']
+            except:
+                raise InvalidParameter(f'no driver id for {oid}')
+            props.update(
+                self._get_driver_props(item_type, driver_id,
+                                       driver_config.get('config')))
+        return props
+
+    def _set_device_items_state(self, k, cfg):
         for item_type in ['unit', 'sensor']:
             items = cfg.get(item_type)
             if items:
                 for oid, item in items.items():
                     if item:
                         oid = f'{item_type}:{oid}'
-                        props = item.copy()
-                        for p in ['controller', 'status', 'value']:
-                            try:
-                                del props[p]
-                            except KeyError:
-                                pass
-                        for i in props.copy():
-                            if i.startswith('__'):
-                                del props[i]
-                        if 'driver' in props:
-                            driver_config = props.get('driver')
-                            del props['driver']
-                        else:
-                            driver_config = None
-                        self._device_set_props(_k, oid, props, save, True)
-                        if driver_config:
-                            try:
-                                driver_id = driver_config['id']
-                            except:
-                                raise InvalidParameter(
-                                    f'no driver id for {oid}')
-                            self.assign_driver(k=_k,
-                                               i=oid,
-                                               d=driver_id,
-                                               c=driver_config.get('config'))
                         status = item.get('status')
                         if item_type == 'sensor' and 'value' in item:
                             status = 1
                         value = item.get('value')
                         if status is not None or value is not None:
-                            self.update(k=_k, i=oid, s=status, v=value)
-        return True
+                            self.update(k=k, i=oid, s=status, v=value)
 
     @log_w
     @api_need_device
@@ -2593,6 +2623,14 @@ class UC_API(GenericAPI):
         item = eva.uc.controller.get_item(i)
         if not item or (is_oid(i) and item and item.item_type != t):
             raise ResourceNotFound('item')
+        self.set_prop(k=k,
+                      i=i,
+                      v=self._get_driver_props(item.item_type, d, c),
+                      save=save)
+        return True
+
+    @staticmethod
+    def _get_driver_props(item_type, d, c):
         if d:
             drv_p = '|' + d
             driver = eva.uc.driverapi.get_driver(d)
@@ -2605,14 +2643,13 @@ class UC_API(GenericAPI):
             c = dict_from_str(c)
         if driver:
             driver.validate_config(c, config_type='state')
-            if item.item_type == 'unit':
+            if item_type == 'unit':
                 driver.validate_config(c, config_type='action')
         props = {'update_driver_config': c, 'update_exec': drv_p}
-        if item.item_type == 'unit':
+        if item_type == 'unit':
             props['action_driver_config'] = c
             props['action_exec'] = drv_p
-        self.set_prop(k=k, i=i, v=props, save=save)
-        return True
+        return props
 
 
 class UC_HTTP_API_abstract(UC_API, GenericHTTP_API):
@@ -97,6 +97,8 @@ class UCItem(eva.item.Item):
                skip_subscribed_mqtt=False,
                for_destroy=False,
                skip_db=False):
+        if not for_destroy and not skip_db and eva.item.batch_notify(self):
+            return
         self.do_notify(skip_subscribed_mqtt=skip_subscribed_mqtt,
                        for_destroy=for_destroy,
                        skip_db=skip_db)
@@ -134,6 +136,8 @@ class UCItem(eva.item.Item):
                 self.log_set(prop, val)
                 self.set_modified(save)
                 self.register_driver_updates()
+                if self.update_scheduler:
+                    self.start_update_scheduler()
             return True
         elif prop == 'update_driver_config':
             if val is None:
@@ -193,6 +197,8 @@ class UCItem(eva.item.Item):
                     del self.snmp_trap['ident_vars']
                     if not self.snmp_trap:
                         self.unsubscribe_snmp_traps()
+                    else:
+                        self.subscribe_snmp_traps()
                     self.log_set('snmp_trap.ident_vars', None)
                     self.set_modified(save)
                 return True
@@ -459,6 +465,11 @@ class UCItem(eva.item.Item):
         except:
             eva.core.log_traceback()
 
+    def get_poll_group(self):
+        if self.update_exec and self.update_exec[0] == '|':
+            return 'phi:' + self.update_exec[1:].split('.', 1)[0]
+        return super().get_poll_group()
+
     def get_update_xc(self, **kwargs):
         if self.update_exec and self.update_exec[0] == '|':
             return eva.runner.DriverCommand(
@@ -4,18 +4,37 @@ __license__ = "Apache License 2.0"
 __version__ = "3.4.2"
 
 import logging
+import eva.core
 import eva.item
 import eva.uc.controller
 
 
 class UCMultiUpdate(eva.item.MultiUpdate):
 
+    def notify_items(self, items):
+        super().notify_items(items)
+        if eva.core.config.db_update == 1:
+            eva.uc.controller.save_items_state(items)
+        for i in items:
+            eva.uc.controller.handle_event(i)
+
+    def _get_items(self, item_ids):
+        items = []
+        oids = set()
+        for i in item_ids:
+            item = eva.uc.controller.get_item(i)
+            if not item or item.oid in oids:
+                return None
+            items.append(item)
+            oids.add(item.oid)
+        return items
+
     def set_prop(self, prop, val=None, save=False):
         if prop == 'item+':
             item = eva.uc.controller.get_item(val)
             if item and \
                     (item.item_type == 'unit' or item.item_type == 'sensor'):
-                if item in self.items_to_update:
+                if self.has_item(item):
                     return False
                 else:
                     self.append(item)
@@ -40,29 +59,15 @@ class UCMultiUpdate(eva.item.MultiUpdate):
         elif prop == 'items':
             if not val:
                 if self.items_to_update:
-                    self.items_to_update = []
+                    self.set_items([])
                     self.set_modified(save)
                 return True
-            if isinstance(val, list):
-                i2u = []
-                for i in val:
-                    item = eva.uc.controller.get_item(i)
-                    if not item or item in i2u:
-                        return False
-                    i2u.append(item)
-                self.items_to_update = i2u
-                self.log_set(prop, ','.join(val))
-                self.set_modified(save)
-                return True
-            item_ids = val.split(',')
-            i2u = []
-            for i in item_ids:
-                item = eva.uc.controller.get_item(i)
-                if not item or item in i2u:
-                    return False
-                i2u.append(item)
-            self.items_to_update = i2u
-            self.log_set(prop, val)
+            i2u = self._get_items(
+                val if isinstance(val, list) else val.split(','))
+            if i2u is None:
+                return False
+            self.set_items(i2u)
+            self.log_set(prop, ','.join(val) if isinstance(val, list) else val)
             self.set_modified(save)
             return True
         else:
@@ -9,6 +9,7 @@ import logging
 import rapidjson
 import sqlalchemy as sa
 import subprocess
+import threading
 import time
 import dateutil
 from datetime import datetime
@@ -37,7 +38,24 @@ _d = SimpleNamespace(msad_host=None,
                      msad_ou='EVA',
                      msad_key_prefix='',
                      msad_cache_time=86400,
-                     msad_cache_first=False)
+                     msad_cache_first=False,
+                     api_log_flush_interval=0.1,
+                     api_log_buffer_size=10000)
+
+# API log pipeline: entries and status updates are buffered in memory and
+# written to user db in batches by the background writer
+_api_log = SimpleNamespace(rows={},
+                           updates={},
+                           lock=threading.Lock(),
+                           flush_lock=threading.Lock(),
+                           queued=0,
+                           written=0,
+                           dropped=0,
+                           errors=0,
+                           dropped_reported=0)
+
+api_log_fields = ('id', 't', 'tf', 'gw', 'ip', 'auth', 'u', 'utp', 'ki', 'func',
+                  'params', 'status')
 
 api_log_clean_delay = 60
 
@@ -262,6 +280,11 @@ def authenticate(user=None, password=None):
             return _format_key(k), 'msad'
 
 
+def _api_log_buf_full():
+    return len(_api_log.rows) + len(_api_log.updates) >= \
+            _d.api_log_buffer_size
+
+
 def api_log_insert(call_id,
                    gw=None,
                    ip=None,
@@ -271,67 +294,117 @@ def api_log_insert(call_id,
                    ki=None,
                    func=None,
                    params=None):
-    dbconn = userdb()
-    dbt = dbconn.begin()
-    try:
-        dbconn.execute(sql(
-            'insert into api_log(id, t, gw, ip, auth, u, utp, ki, func, params)'
-            ' values (:i, :t, :gw, :ip, :auth, :u, :utp, :ki, :func, :params)'),
-                       i=call_id,
-                       t=time.time(),
-                       gw=gw,
-                       ip=ip,
-                       auth=auth,
-                       u=u,
-                       utp=utp,
-                       ki=ki,
-                       func=func,
-                       params=rapidjson.dumps(params)[:512])
-        dbt.commit()
-    except:
-        dbt.rollback()
-        logging.error('Unable to insert API call info into DB')
-        eva.core.log_traceback()
+    row = {
+        'id': call_id,
+        't': time.time(),
+        'tf': None,
+        'gw': gw,
+        'ip': ip,
+        'auth': auth,
+        'u': u,
+        'utp': utp,
+        'ki': ki,
+        'func': func,
+        'params': rapidjson.dumps(params)[:512],
+        'status': None
+    }
+    with _api_log.lock:
+        if _api_log_buf_full():
+            _api_log.dropped += 1
+        else:
+            _api_log.rows[call_id] = row
+            _api_log.queued += 1
+
+
+def _api_log_update(call_id, data):
+    with _api_log.lock:
+        # merge with the pending entry or update
+        try:
+            _api_log.rows[call_id].update(data)
+            return
+        except KeyError:
+            pass
+        try:
+            _api_log.updates[call_id].update(data)
+        except KeyError:
+            if _api_log_buf_full():
+                _api_log.dropped += 1
+            else:
+                _api_log.updates[call_id] = data
+                _api_log.queued += 1
 
 
 def api_log_set_status(call_id, status=None):
-    dbconn = userdb()
-    dbt = dbconn.begin()
-    try:
-        dbconn.execute(
-            sql('update api_log set tf=:tf, status=:status where id=:i'),
-            i=call_id,
-            tf=time.time(),
-            status=status)
-        dbt.commit()
-    except:
-        dbt.rollback()
-        logging.error('Unable to update API call info in DB')
-        eva.core.log_traceback()
+    _api_log_update(call_id, {'tf': time.time(), 'status': status})
 
 
 def api_log_update(call_id, **kwargs):
     # unsafe, make sure kwargs keys are not coming from outside
-    cond = ''
-    qkw = {'i': call_id}
-    for k, v in kwargs.items():
-        if cond:
-            cond += ','
-        cond += f'{k}=:{k}'
-        qkw[k] = v
-    if cond:
+    if kwargs:
+        _api_log_update(call_id, kwargs)
+
+
+def api_log_flush():
+    """
+    write buffered API log entries and updates to user db
+    """
+    with _api_log.flush_lock:
+        with _api_log.lock:
+            rows = _api_log.rows
+            updates = _api_log.updates
+            if not rows and not updates:
+                return
+            _api_log.rows = {}
+            _api_log.updates = {}
+        # group updates by the field set to execute them in batches
+        batches = {}
+        for call_id, data in updates.items():
+            fields = tuple(sorted(data))
+            qkw = data.copy()
+            qkw['i'] = call_id
+            batches.setdefault(fields, []).append(qkw)
         dbconn = userdb()
         dbt = dbconn.begin()
         try:
-            dbconn.execute(sql(f'update api_log set {cond} where id=:i'), **qkw)
+            if rows:
+                dbconn.execute(
+                    sql('insert into api_log({}) values ({})'.format(
+                        ', '.join(api_log_fields),
+                        ', '.join(f':{f}' for f in api_log_fields))),
+                    list(rows.values()))
+            for fields, params in batches.items():
+                cond = ','.join(f'{f}=:{f}' for f in fields)
+                dbconn.execute(sql(f'update api_log set {cond} where id=:i'),
+                               params)
             dbt.commit()
+            _api_log.written += len(rows) + len(updates)
         except:
             dbt.rollback()
-            logging.error('Unable to update API call info in DB')
+            _api_log.errors += 1
+            logging.error('Unable to write API call info into DB')
             eva.core.log_traceback()
+    if _api_log.dropped != _api_log.dropped_reported:
+        logging.warning('API log buffer is full, {} record(s) dropped'.format(
+            _api_log.dropped - _api_log.dropped_reported))
+        _api_log.dropped_reported = _api_log.dropped
+
+
+def api_log_get_stats():
+    """
+    get API log pipeline stats
+    """
+    with _api_log.lock:
+        return {
+            'pending': len(_api_log.rows) + len(_api_log.updates),
+            'queued': _api_log.queued,
+            'written': _api_log.written,
+            'dropped': _api_log.dropped,
+            'errors': _api_log.errors
+        }
 
 
 def api_log_get(t_start=None, t_end=None, limit=None, time_format=None, f=None):
+    api_log_flush()
     t_start = fmt_time(t_start)
     t_end = fmt_time(t_end)
     qkw = {}
@@ -559,6 +632,16 @@ def init():
 
 
 def update_config(cfg):
+    try:
+        _d.api_log_flush_interval = float(cfg.get('server/api-log-flush'))
+    except LookupError:
+        pass
+    logging.debug(f'server.api_log_flush = {_d.api_log_flush_interval}')
+    try:
+        _d.api_log_buffer_size = int(cfg.get('server/api-log-buffer'))
+    except LookupError:
+        pass
+    logging.debug(f'server.api_log_buffer = {_d.api_log_buffer_size}')
     try:
         host = cfg.get('msad/host')
     except LookupError:
@@ -603,8 +686,15 @@ def run_hook(cmd, u, password=None):
     return True
 
 
+@eva.core.dump
+@eva.core.minidump
+def dump():
+    return {'api_log': api_log_get_stats()}
+
+
 def start():
     if eva.core.config.keep_api_log:
+        api_log_writer.start(_interval=_d.api_log_flush_interval)
         api_log_cleaner.start()
     if _d.msad_host and _d.msad_cache_time > 0:
         msad_cache_cleaner.start()
@@ -613,7 +703,16 @@ def start():
 @eva.core.stop
 def stop():
     if eva.core.config.keep_api_log:
+        api_log_writer.stop()
         api_log_cleaner.stop()
+        api_log_flush()
+
+
+@background_worker(delay=0.1,
+                   name='users:api_log_writer',
+                   on_error=eva.core.log_traceback)
+def api_log_writer(**kwargs):
+    api_log_flush()
 
 
 @background_worker(delay=api_log_clean_delay,
@@ -15,6 +15,7 @@ sys.path.insert(0, (Path(__file__).parent.parent / 'lib').as_posix())
 
 import eva.core
 import eva.sysapi
+import eva.pollscheduler
 import eva.upnp
 import eva.notify
 import eva.lurp
@@ -92,6 +93,7 @@ eva.upnp.update_config(cfg)
 eva.upnp.port = 1917
 eva.upnp._data.discover_ports = (1912,)
 eva.sysapi.update_config(cfg)
+eva.pollscheduler.update_config(cfg)
 eva.lm.controller.update_config(cfg)
 
 eva.core.start()
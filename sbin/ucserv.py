@@ -15,6 +15,7 @@ sys.path.insert(0, (Path(__file__).parent.parent / 'lib').as_posix())
 
 import eva.core
 import eva.sysapi
+import eva.pollscheduler
 import eva.traphandler
 import eva.udpapi
 import eva.upnp
@@ -97,6 +98,7 @@ eva.api.update_config(cfg)
 eva.upnp.update_config(cfg)
 eva.upnp.port = 1912
 eva.sysapi.update_config(cfg)
+eva.pollscheduler.update_config(cfg)
 eva.uc.modbus.update_config(cfg)
 eva.datapuller.update_config(cfg)
 